@@ -1,18 +1,29 @@
-
 // State
 let rawData = [];
 let chartInstance = null;
 let currentChartType = 'line';
+let currentRange = 'ALL';
+let manifest = null;
+let dashboardRequest = 0;
+const shardCache = {};
 
 // Constants
-let currentDataUrl = 'output/lineas_por_servicio_long.csv';
+const SHARDS_DIR = 'output/shards/';
+const MANIFEST_URL = SHARDS_DIR + 'manifest.json';
+let currentSource = 'servicio';
 const EXCLUDED_CATEGORIES = ['TOTAL_EMPRESA', 'TOTAL_MERCADO', 'CHECK_SUM_SERVICIOS', 'CHECK_SUM_TOTALES_EMPRESA', 'CHECK_SUM_MODALIDADES'];
 const TOTAL_CATEGORIES = ['TOTAL_EMPRESA', 'TOTAL_MERCADO'];
+// Resolutions precomputed by the export stage, finest first (months per point)
+const RESOLUTIONS = { monthly: 1, quarterly: 3, annual: 12 };
+const RESOLUTION_TITLES = { monthly: 'Mensual', quarterly: 'Trimestral', annual: 'Anual' };
+// 20 years of monthly points: every published series so far is charted monthly under "Todo"
+const MAX_CHART_POINTS = 240;
 
 // DOM Elements
 const navBtns = document.querySelectorAll('.nav-btn');
 const companySelect = document.getElementById('companySelect');
 const categorySelect = document.getElementById('categorySelect');
+const rangeSelect = document.getElementById('rangeSelect');
 const summaryCards = document.getElementById('summaryCards');
 const ctx = document.getElementById('mainChart').getContext('2d');
 const toggleBtns = document.querySelectorAll('.toggle-btn');
@@ -36,8 +47,8 @@ function setupEventListeners() {
 
             // Data Reload
             const newSource = e.target.dataset.source;
-            if (currentDataUrl !== newSource) {
-                currentDataUrl = newSource;
+            if (currentSource !== newSource) {
+                currentSource = newSource;
                 // Reset filters
                 companySelect.innerHTML = '<option value="ALL">Total</option>';
                 categorySelect.innerHTML = '<option value="ALL">Total</option>';
@@ -48,6 +59,10 @@ function setupEventListeners() {
 
     companySelect.addEventListener('change', updateDashboard);
     categorySelect.addEventListener('change', updateDashboard);
+    rangeSelect.addEventListener('change', () => {
+        currentRange = rangeSelect.value;
+        updateDashboard();
+    });
 
     toggleBtns.forEach(btn => {
         btn.addEventListener('click', (e) => {
@@ -60,56 +75,124 @@ function setupEventListeners() {
 }
 
 function loadData() {
-    console.log("Fetching data from:", currentDataUrl);
-
-    Papa.parse(currentDataUrl, {
-        download: true,
-        header: true,
-        dynamicTyping: true,
-        skipEmptyLines: true,
-        complete: function (results) {
-            processRawData(results.data);
-        },
-        error: function (err) {
-            console.error("Error parsing CSV:", err);
-            // Mostrar error visual al usuario
-            const container = document.querySelector('.dashboard-grid');
-            if (container) {
-                container.innerHTML = `<div style="padding: 2rem; color: #ef4444;">
-                    <h2>Error cargando datos</h2>
-                    <p>No se pudo acceder a: ${currentDataUrl}</p>
-                    <p>Asegúrate de estar ejecutando el servidor local (python -m http.server)</p>
-                </div>`;
-            }
-        }
+    // The manifest lists companies/categories and the shard file for each view,
+    // so the first paint only needs the market-total shard.
+    const ready = manifest ? Promise.resolve(manifest) : fetchJson(MANIFEST_URL).then(m => (manifest = m));
+
+    ready
+        .then(() => {
+            populateFilters();
+            return updateDashboard();
+        })
+        .catch(err => showLoadError(err, MANIFEST_URL));
+}
+
+function fetchJson(url) {
+    console.log("Fetching data from:", url);
+    return fetch(url).then(res => {
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        return res.json();
+    });
+}
+
+function loadShard(path) {
+    // Shards are immutable per update, keep them in memory once fetched
+    if (!shardCache[path]) {
+        shardCache[path] = fetchJson(SHARDS_DIR + path)
+            .then(shardToResolutions)
+            .catch(err => {
+                delete shardCache[path];
+                throw err;
+            });
+    }
+    return shardCache[path];
+}
+
+function shardToRows(shard, dates, series) {
+    // Expand the columnar shard back to the row format used by the chart logic
+    const rows = [];
+    Object.entries(series).forEach(([category, values]) => {
+        values.forEach((value, i) => {
+            if (value === null) return;
+            rows.push({ date: dates[i], company: shard.company, category, value, source: shard.source });
+        });
+    });
+    return rows;
+}
+
+function shardToResolutions(shard) {
+    const byResolution = { monthly: shardToRows(shard, shard.dates, shard.series) };
+    Object.entries(shard.resolutions || {}).forEach(([name, res]) => {
+        byResolution[name] = shardToRows(shard, res.dates, res.series);
     });
+    return byResolution;
 }
 
-function processRawData(data) {
-    // 1. Find the last date where 'TOTAL_MERCADO' has a real value (> 0)
-    //    This avoids "future" months that only contain checksum columns with 0.0
-    const marketTotals = data.filter(d => d.category === 'TOTAL_MERCADO' && d.value > 0);
-
-    if (marketTotals.length > 0) {
-        // Sort dates just in case and pick the last one
-        marketTotals.sort((a, b) => new Date(a.date) - new Date(b.date));
-        const maxValidDate = marketTotals[marketTotals.length - 1].date;
-
-        // 2. Filter rawData to exclude anything after that date
-        rawData = data.filter(d => d.date <= maxValidDate);
-    } else {
-        // Fallback if no TOTAL_MERCADO found
-        rawData = data.filter(d => d.value !== null && d.value !== '');
+function pickResolution(monthlyData) {
+    // Visible range in months, then the finest resolution that keeps the chart under MAX_CHART_POINTS
+    const dates = [...new Set(monthlyData.map(d => d.date))].sort();
+    let months = dates.length;
+    let fromDate = null;
+
+    if (currentRange !== 'ALL' && dates.length > 0) {
+        months = Math.min(parseInt(currentRange, 10), dates.length);
+        const [y, m] = dates[dates.length - 1].split('-').map(Number);
+        const start = new Date(y, m - months, 1);
+        fromDate = `${start.getFullYear()}-${String(start.getMonth() + 1).padStart(2, '0')}-01`;
     }
 
-    populateFilters();
-    updateDashboard();
+    const resolution = Object.keys(RESOLUTIONS)
+        .find(r => Math.ceil(months / RESOLUTIONS[r]) <= MAX_CHART_POINTS) || 'annual';
+    return { resolution, fromDate };
+}
+
+function periodLabel(date, resolution) {
+    // Aggregated points are dated on the last month of their period: 2025-12-01 -> 2025-T4 / 2025
+    const [y, m] = date.split('-');
+    if (resolution === 'quarterly') return `${y}-T${Math.ceil(Number(m) / 3)}`;
+    if (resolution === 'annual') return y;
+    return date;
+}
+
+function shardsForSelection() {
+    const source = manifest.sources[currentSource];
+    const selectedCompany = companySelect.value;
+    const selectedCategory = categorySelect.value;
+
+    if (selectedCompany !== 'ALL') return [source.companies[selectedCompany]];
+    if (selectedCategory !== 'ALL') return Object.values(source.companies);
+    return [source.market];
+}
+
+function applyDateCutoff(data) {
+    // Exclude "future" months after the last date where 'TOTAL_MERCADO' has a real value (> 0).
+    // The cutoff is precomputed by the export stage and stored in the manifest.
+    const maxValidDate = manifest.sources[currentSource].last_valid_date;
+    if (maxValidDate) {
+        return data.filter(d => d.date <= maxValidDate);
+    }
+    // Fallback if no TOTAL_MERCADO found
+    return data.filter(d => d.value !== null && d.value !== '');
+}
+
+function showLoadError(err, url) {
+    console.error("Error loading data:", err);
+    // Mostrar error visual al usuario
+    const container = document.querySelector('.dashboard-grid');
+    if (container) {
+        container.innerHTML = `<div style="padding: 2rem; color: #ef4444;">
+            <h2>Error cargando datos</h2>
+            <p>No se pudo acceder a: ${url}</p>
+            <p>Asegúrate de estar ejecutando el servidor local (python -m http.server)</p>
+        </div>`;
+    }
 }
 
 function populateFilters() {
-    // Extract unique companies (excluding aggregates if desired, but we keep them for now)
-    // Actually, distinct companies are needed.
-    const companies = [...new Set(rawData.map(d => d.company))].filter(c => c !== 'TOTAL_MERCADO').sort();
+    const source = manifest.sources[currentSource];
+
+    // Distinct companies come from the manifest (market total has its own shard)
+    const companies = Object.keys(source.companies).filter(c => c !== 'TOTAL_MERCADO').sort();
 
     companies.forEach(c => {
         const opt = document.createElement('option');
@@ -119,7 +202,7 @@ function populateFilters() {
     });
 
     // Extract unique categories (clean ones)
-    const categories = [...new Set(rawData.map(d => d.category))]
+    const categories = source.categories
         .filter(c => !EXCLUDED_CATEGORIES.includes(c) && !TOTAL_CATEGORIES.includes(c))
         .sort();
 
@@ -131,7 +214,7 @@ function populateFilters() {
     });
 }
 
-function processDataForChart() {
+function processDataForChart(data) {
     const selectedCompany = companySelect.value;
     const selectedCategory = categorySelect.value;
 
@@ -140,20 +223,20 @@ function processDataForChart() {
     let labels = [];
 
     // Get all unique dates sorted
-    const allDates = [...new Set(rawData.map(d => d.date))].sort();
+    const allDates = [...new Set(data.map(d => d.date))].sort();
     labels = allDates;
 
     // SCENARIO 1: ALL Companies, ALL Categories -> Show Total Market
     if (selectedCompany === 'ALL' && selectedCategory === 'ALL') {
         const dataPoints = allDates.map(date => {
             // Try to find TOTAL_MERCADO record first
-            const record = rawData.find(r => r.date === date && r.category === 'TOTAL_MERCADO');
+            const record = data.find(r => r.date === date && r.category === 'TOTAL_MERCADO');
             if (record) return record.value;
 
             // Fallback: Sum of TOTAL_EMPRESA for all companies
-            const companies = [...new Set(rawData.map(d => d.company))].filter(c => c !== 'TOTAL_MERCADO');
+            const companies = [...new Set(data.map(d => d.company))].filter(c => c !== 'TOTAL_MERCADO');
             return companies.reduce((sum, comp) => {
-                const r = rawData.find(d => d.date === date && d.company === comp && d.category === 'TOTAL_EMPRESA');
+                const r = data.find(d => d.date === date && d.company === comp && d.category === 'TOTAL_EMPRESA');
                 return sum + (r ? r.value : 0);
             }, 0);
         });
@@ -171,11 +254,11 @@ function processDataForChart() {
     }
     // SCENARIO 2: ALL Companies, Specific Category -> Show that Category per Company
     else if (selectedCompany === 'ALL' && selectedCategory !== 'ALL') {
-        const companies = [...new Set(rawData.map(d => d.company))].filter(c => c !== 'TOTAL_MERCADO');
+        const companies = [...new Set(data.map(d => d.company))].filter(c => c !== 'TOTAL_MERCADO');
 
         companies.forEach((comp, index) => {
             const dataPoints = allDates.map(date => {
-                const record = rawData.find(r => r.date === date && r.company === comp && r.category === selectedCategory);
+                const record = data.find(r => r.date === date && r.company === comp && r.category === selectedCategory);
                 return record ? record.value : 0;
             });
 
@@ -194,7 +277,7 @@ function processDataForChart() {
     // SCENARIO 3: Specific Company, ALL Categories -> Show Total for that Company
     else if (selectedCompany !== 'ALL' && selectedCategory === 'ALL') {
         const dataPoints = allDates.map(date => {
-            const record = rawData.find(r => r.date === date && r.company === selectedCompany && r.category === 'TOTAL_EMPRESA');
+            const record = data.find(r => r.date === date && r.company === selectedCompany && r.category === 'TOTAL_EMPRESA');
             return record ? record.value : 0;
         });
 
@@ -212,7 +295,7 @@ function processDataForChart() {
     // SCENARIO 4: Specific Company, Specific Category -> Single Line
     else {
         const dataPoints = allDates.map(date => {
-            const record = rawData.find(r => r.date === date && r.company === selectedCompany && r.category === selectedCategory);
+            const record = data.find(r => r.date === date && r.company === selectedCompany && r.category === selectedCategory);
             return record ? record.value : 0;
         });
 
@@ -254,7 +337,23 @@ function processDataForChart() {
     return { labels, datasets };
 }
 
-function updateChart(data) {
+function updateChart(data, resolution = 'monthly') {
+    const labels = data.labels.map(date => periodLabel(date, resolution));
+    const axisTitle = RESOLUTION_TITLES[resolution];
+
+    // Same chart type: swap labels and update datasets in place so Chart.js animates instead of rebuilding
+    if (chartInstance && chartInstance.config.type === currentChartType) {
+        const existing = chartInstance.data.datasets;
+        chartInstance.data.labels = labels;
+        chartInstance.options.scales.x.title.text = axisTitle;
+        chartInstance.data.datasets = data.datasets.map(ds => {
+            const current = existing.find(e => e.label === ds.label);
+            return current ? Object.assign(current, ds) : ds;
+        });
+        chartInstance.update();
+        return;
+    }
+
     if (chartInstance) {
         chartInstance.destroy();
     }
@@ -264,7 +363,7 @@ function updateChart(data) {
     chartInstance = new Chart(ctx, {
         type: currentChartType,
         data: {
-            labels: data.labels,
+            labels: labels,
             datasets: data.datasets
         },
         options: {
@@ -308,6 +407,7 @@ function updateChart(data) {
             scales: {
                 x: {
                     stacked: isBar,
+                    title: { display: true, text: axisTitle, color: '#94a3b8', font: { family: 'Outfit', size: 12 } },
                     ticks: { color: '#94a3b8' },
                     grid: { color: 'rgba(255, 255, 255, 0.05)' }
                 },
@@ -406,10 +506,31 @@ function updateKPIs(data) {
 }
 
 function updateDashboard() {
-    if (rawData.length === 0) return;
-    const chartData = processDataForChart();
-    updateChart(chartData);
-    updateKPIs(chartData);
+    if (!manifest) return Promise.resolve();
+    const paths = shardsForSelection();
+    const request = ++dashboardRequest;
+
+    return Promise.all(paths.map(loadShard))
+        .then(shards => {
+            // A newer filter change superseded this one while shards were loading
+            if (request !== dashboardRequest) return;
+            rawData = applyDateCutoff([].concat(...shards.map(s => s.monthly)));
+            if (rawData.length === 0) return;
+
+            // KPIs always use the monthly series; the chart uses the resolution that fits the visible range
+            const monthlyData = processDataForChart(rawData);
+            const { resolution, fromDate } = pickResolution(rawData);
+            let chartData = monthlyData;
+            if (resolution !== 'monthly' || fromDate) {
+                const rows = resolution === 'monthly'
+                    ? rawData
+                    : applyDateCutoff([].concat(...shards.map(s => s[resolution] || s.monthly)));
+                chartData = processDataForChart(fromDate ? rows.filter(d => d.date >= fromDate) : rows);
+            }
+            updateChart(chartData, resolution);
+            updateKPIs(monthlyData);
+        })
+        .catch(err => showLoadError(err, SHARDS_DIR + paths.join(', ')));
 }
 
 // Helpers
@@ -1,44 +1,221 @@
 
 import csv
+import io
 import json
 import os
+import re
 
-def csv_to_js_var(csv_path, var_name):
-    if not os.path.exists(csv_path):
-        print(f"Error: {csv_path} not found")
-        return "[]"
-    
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+import etl_unified
+
+# Tamaño del buffer de escritura (bytes). Las filas se serializan una a una,
+# así que la memoria queda acotada por este buffer y no por el tamaño del CSV.
+WRITE_BUFFER_SIZE = 1 << 16
+
+def _iter_rows(csv_path):
+    """Lee el CSV fila a fila convirtiendo 'value' a float."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
         reader = csv.DictReader(f)
-        rows = list(reader)
-        # Convert numeric values
-        for row in rows:
+        for row in reader:
+            # Convert numeric values
             if 'value' in row:
                 try:
                     row['value'] = float(row['value'])
                 except:
                     row['value'] = 0.0
-    
-    json_str = json.dumps(rows)
-    return f"const {var_name} = {json_str};"
+            yield row
+
+def write_js_var(out, csv_path, var_name):
+    """
+    Escribe `const var_name = [...];` en `out` sin materializar el CSV.
+    La salida es idéntica a la de json.dumps(list_of_rows).
+    """
+    if not os.path.exists(csv_path):
+        print(f"Error: {csv_path} not found")
+        out.write("[]")
+        return
+
+    out.write(f"const {var_name} = [")
+    first = True
+    for row in _iter_rows(csv_path):
+        if not first:
+            out.write(", ")
+        out.write(json.dumps(row))
+        first = False
+    out.write("];")
+
+def csv_to_js_var(csv_path, var_name):
+    buf = io.StringIO()
+    write_js_var(buf, csv_path, var_name)
+    return buf.getvalue()
+
+def write_js_file(output_js_path, variables):
+    """Escribe varias variables (csv_path, var_name) separadas por una línea en blanco."""
+    with open(output_js_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        for i, (csv_path, var_name) in enumerate(variables):
+            if i > 0:
+                f.write("\n\n")
+            write_js_var(f, csv_path, var_name)
+
+# =========================
+# SHARDS POR VISTA (dashboard)
+# =========================
+# El dashboard carga primero solo el total de mercado y pide el resto de
+# shards (uno por empresa) cuando el usuario los selecciona.
+SHARD_SOURCES = [
+    # (clave en el manifest, csv de entrada, reporte en etl_unified.extract)
+    ("servicio", "lineas_por_servicio_long.csv", "servicios"),
+    ("modalidad", "lineas_por_modalidad_fact.csv", "modalidad"),
+]
+MARKET_COMPANY = "TOTAL_MERCADO"
+
+def _slug(texto):
+    return re.sub(r"[^a-z0-9]+", "_", texto.lower()).strip("_")
 
-def main():
-    base_dir = r"C:\Users\HP\OneDrive\JpE\Github\telefonia"
-    output_dir = os.path.join(base_dir, "output")
+def _write_json(path, obj):
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+
+# Resoluciones agregadas que se precalculan además de la mensual
+# (meses por período). Las líneas activas son un stock: cada período toma
+# el valor de su último mes disponible.
+RESOLUTIONS = {"quarterly": 3, "annual": 12}
+
+def _aggregate(dates, series, months_per_period, last_valid_date):
+    """Agrega la serie mensual por período; la etiqueta es la fecha del último mes usado."""
+    last_idx = {}
+    for i, d in enumerate(dates):
+        if last_valid_date is not None and d > last_valid_date:
+            break
+        year, month = int(d[:4]), int(d[5:7])
+        last_idx[(year, (month - 1) // months_per_period)] = i
+    idx = [last_idx[k] for k in sorted(last_idx)]
+    return {
+        "dates": [dates[i] for i in idx],
+        "series": {cat: [values[i] for i in idx] for cat, values in series.items()},
+    }
+
+def _build_shard(source, company, rows, last_valid_date=None):
+    """
+    Formato columnar: una lista de fechas y un vector de valores por categoría,
+    más las mismas series agregadas en cada resolución de RESOLUTIONS
+    (solo hasta last_valid_date, para no arrastrar meses futuros vacíos).
+    """
+    dates = sorted({r['date'] for r in rows})
+    pos = {d: i for i, d in enumerate(dates)}
+    series = {}
+    for r in rows:
+        values = series.setdefault(r['category'], [None] * len(dates))
+        values[pos[r['date']]] = r['value']
+    resolutions = {
+        name: _aggregate(dates, series, months, last_valid_date)
+        for name, months in RESOLUTIONS.items()
+    }
+    return {"source": source, "company": company, "dates": dates, "series": series,
+            "resolutions": resolutions}
+
+def _iter_frame_rows(df):
+    """Filas de un DataFrame de etl_unified.extract con el mismo formato que _iter_rows."""
+    for d, company, category, value, source in zip(
+            df['date'], df['company'], df['category'], df['value'], df['source']):
+        yield {
+            'date': d.isoformat()[:10] if hasattr(d, 'isoformat') else str(d),
+            'company': str(company),
+            'category': str(category),
+            'value': float(value),
+            'source': str(source),
+        }
+
+def export_source_shards(csv_path, source_key, shards_dir, df=None):
+    """
+    Parte una fuente larga en un shard por empresa más uno de total de mercado.
+    Si se pasa df (salida de etl_unified.extract) se usa en memoria; si no, se lee csv_path.
+    Las filas CHECK_* no se exportan (el dashboard no las usa).
+    Retorna la entrada del manifest para esta fuente, o None si no hay datos.
+    """
+    if df is not None:
+        rows = _iter_frame_rows(df)
+    elif os.path.exists(csv_path):
+        rows = _iter_rows(csv_path)
+    else:
+        print(f"Error: {csv_path} not found")
+        return None
+
+    por_empresa = {}
+    source = None
+    last_valid_date = None
+    for row in rows:
+        if row['category'].startswith("CHECK_"):
+            continue
+        source = source or row.get('source')
+        if row['category'] == "TOTAL_MERCADO" and row['value'] > 0:
+            if last_valid_date is None or row['date'] > last_valid_date:
+                last_valid_date = row['date']
+        por_empresa.setdefault(row['company'], []).append(row)
+
+    out_dir = os.path.join(shards_dir, source_key)
+    os.makedirs(out_dir, exist_ok=True)
+
+    entry = {
+        "last_valid_date": last_valid_date,
+        "market": None,
+        "companies": {},
+        "categories": [],
+    }
+    categorias = set()
+    for company, rows in por_empresa.items():
+        file_name = f"{_slug(company)}.json"
+        _write_json(os.path.join(out_dir, file_name), _build_shard(source, company, rows, last_valid_date))
+        rel = f"{source_key}/{file_name}"
+        if company == MARKET_COMPANY:
+            entry["market"] = rel
+        else:
+            entry["companies"][company] = rel
+            categorias.update(r['category'] for r in rows)
+
+    entry["categories"] = sorted(categorias)
+    return entry
+
+def export_shards(output_dir, shards_dir=None, frames=None):
+    """
+    Genera los shards de todas las fuentes y el manifest.json que los indexa.
+    frames: {reporte: DataFrame} ya extraídos (ver etl_unified.main); las
+    fuentes que no estén ahí se leen de los CSV de output_dir.
+    """
+    frames = frames or {}
+    if shards_dir is None:
+        shards_dir = os.path.join(output_dir, "shards")
+    os.makedirs(shards_dir, exist_ok=True)
+
+    manifest = {"sources": {}}
+    for source_key, csv_name, report in SHARD_SOURCES:
+        entry = export_source_shards(os.path.join(output_dir, csv_name), source_key, shards_dir,
+                                     frames.get(report))
+        if entry is not None:
+            manifest["sources"][source_key] = entry
+
+    manifest_path = os.path.join(shards_dir, "manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"Shards generados en: {shards_dir}")
+    return manifest_path
+
+def main(output_dir=None):
+    # Mismas rutas que el ETL (TELEFONIA_BASE_DIR o la carpeta del repo)
+    output_dir = output_dir or etl_unified.OUTPUT_DIR
     
     path_serv = os.path.join(output_dir, "lineas_por_servicio_long.csv")
     path_mod = os.path.join(output_dir, "lineas_por_modalidad_fact.csv")
     
-    js_content = []
-    js_content.append(csv_to_js_var(path_serv, "DATA_SERVICIO"))
-    js_content.append(csv_to_js_var(path_mod, "DATA_MODALIDAD"))
+    output_js_path = os.path.join(etl_unified.BASE_DIR, "data_static.js")
     
-    output_js_path = os.path.join(base_dir, "data_static.js")
-    
-    with open(output_js_path, 'w', encoding='utf-8') as f:
-        f.write("\n\n".join(js_content))
+    write_js_file(output_js_path, [
+        (path_serv, "DATA_SERVICIO"),
+        (path_mod, "DATA_MODALIDAD"),
+    ])
     
     print(f"Creado archivo estático: {output_js_path}")
 
+    export_shards(output_dir)
+
 if __name__ == "__main__":
     main()
@@ -1,8 +1,9 @@
 import os
+import json
 import requests
-from bs4 import BeautifulSoup
 import re
 import time
+from html.parser import HTMLParser
 
 # URL de la página
 BASE_URL = "https://www.arcotel.gob.ec/lineas-activas/"
@@ -10,6 +11,11 @@ BASE_URL = "https://www.arcotel.gob.ec/lineas-activas/"
 # Carpeta de destino
 DOWNLOAD_DIR = "datos_descargados"
 
+# Índice incremental de enlaces ya clasificados + ETag del último listado
+INDEX_PATH = os.path.join(DOWNLOAD_DIR, "indice_enlaces.json")
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
 # Mapeo de meses en español a números para ordenar
 MESES = {
     'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
@@ -18,9 +24,10 @@ MESES = {
     'jul': 7, 'ago': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dic': 12
 }
 
-def obtener_fecha_desde_texto(texto):
+def obtener_fecha_desde_texto(texto, meses=MESES):
     """
     Intenta extraer (año, mes) de un texto (URL o nombre).
+    `meses` mapea nombres de mes a número (por defecto en español).
     Retorna (año, mes) o (0, 0) si no encuentra.
     """
     # Patrón 1: _Mes_Año (ej: _octubre_2025)
@@ -28,7 +35,7 @@ def obtener_fecha_desde_texto(texto):
     if match:
         mes_str = match.group(1).lower()
         anio = int(match.group(2))
-        mes_num = MESES.get(mes_str, 0)
+        mes_num = meses.get(mes_str, 0)
         if mes_num > 0:
             return anio, mes_num
             
@@ -37,80 +44,211 @@ def obtener_fecha_desde_texto(texto):
     if match:
         mes_str = match.group(1).lower()
         anio = int(match.group(2))
-        mes_num = MESES.get(mes_str, 0)
+        mes_num = meses.get(mes_str, 0)
         if mes_num > 0:
             return anio, mes_num
             
     return 0, 0
 
-def identificar_tipo_archivo(nombre_archivo):
-    """Retorna 'servicio', 'modalidad' o None según el nombre."""
+# Tipo de archivo -> fragmentos del nombre que lo identifican (gana el primero que coincida)
+TIPOS_ARCHIVO = {
+    'servicio': ['1.1.1', 'servicio'],
+    'modalidad': ['1.1.2', 'modalidad'],
+}
+
+def identificar_tipo_archivo(nombre_archivo, tipos=TIPOS_ARCHIVO):
+    """Retorna el tipo de archivo ('servicio', 'modalidad', ...) o None según el nombre."""
     nombre = nombre_archivo.lower()
-    if '1.1.1' in nombre or 'servicio' in nombre:
-        return 'servicio'
-    if '1.1.2' in nombre or 'modalidad' in nombre:
-        return 'modalidad'
+    for tipo, fragmentos in tipos.items():
+        if any(frag in nombre for frag in fragmentos):
+            return tipo
     return None
 
-def descargar_archivos_recientes():
-    # Crear carpeta si no existe
-    if not os.path.exists(DOWNLOAD_DIR):
-        os.makedirs(DOWNLOAD_DIR)
+class _ExcelHrefParser(HTMLParser):
+    """Extrae en streaming los href de <a> que apuntan a Excel, sin construir el árbol."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        for name, value in attrs:
+            if name == 'href' and value:
+                # Filtramos solo excels
+                if value.lower().endswith(('.xlsx', '.xls')):
+                    self.hrefs.append(value)
+                break
+
+def extraer_hrefs_excel(html):
+    """Retorna los href a archivos .xlsx/.xls en el orden en que aparecen."""
+    parser = _ExcelHrefParser()
+    parser.feed(html)
+    parser.close()
+    return parser.hrefs
+
+def clasificar_enlace(href, meses=MESES, tipos=TIPOS_ARCHIVO):
+    """
+    Retorna {'anio', 'mes', 'tipo', 'nombre'} para un enlace de reporte,
+    o None si no es un 1.1.1/1.1.2 con fecha reconocible.
+    """
+    nombre = os.path.basename(href)
+    anio, mes = obtener_fecha_desde_texto(nombre, meses)
+    if anio == 0 or mes == 0:
+         # Intento con el href completo si el nombre falla
+         anio, mes = obtener_fecha_desde_texto(href, meses)
+    if anio == 0 or mes == 0:
+        return None
+    tipo = identificar_tipo_archivo(nombre, tipos)
+    if not tipo:
+        return None
+    return {'anio': anio, 'mes': mes, 'tipo': tipo, 'nombre': nombre}
+
+def cargar_indice(path=INDEX_PATH):
+    if not os.path.exists(path):
+        return {'etag': None, 'last_modified': None, 'hrefs': [], 'enlaces': {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ADVERTENCIA: índice de enlaces ilegible ({e}), se reconstruye.")
+        return {'etag': None, 'last_modified': None, 'hrefs': [], 'enlaces': {}}
+    indice.setdefault('etag', None)
+    indice.setdefault('last_modified', None)
+    indice.setdefault('hrefs', [])
+    indice.setdefault('enlaces', {})
+    return indice
+
+def guardar_indice(indice, path=INDEX_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def actualizar_indice(indice, hrefs, clasificar=clasificar_enlace):
+    """
+    Clasifica los enlaces nuevos y vuelve a clasificar los que antes no se
+    reconocieron (None): son pocos, y así un arreglo en MESES/TIPOS_ARCHIVO
+    los recupera sin borrar el índice. Retorna cuántos se clasificaron.
+    """
+    nuevos = 0
+    enlaces = indice['enlaces']
+    for href in hrefs:
+        if enlaces.get(href) is None:
+            enlaces[href] = clasificar(href)
+            nuevos += 1
+    indice['hrefs'] = list(hrefs)
+    return nuevos
+
+def agrupar_disponibles(indice):
+    """{(anio, mes): {'servicio': {...}, 'modalidad': {...}}} a partir del listado actual."""
+    disponibles = {}
+    for href in indice['hrefs']:
+        info = indice['enlaces'].get(href)
+        if not info:
+            continue
+        key = (info['anio'], info['mes'])
+        if key not in disponibles:
+            disponibles[key] = {}
+        disponibles[key][info['tipo']] = {'url': href, 'nombre': info['nombre']}
+    return disponibles
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-]+)', re.IGNORECASE)
 
-    print(f"Conectando a {BASE_URL}...")
+def decodificar_html(response):
+    """
+    Decodifica el HTML desde los bytes. requests asume ISO-8859-1 cuando el
+    Content-Type no trae charset, lo que rompe los href con tildes; en ese caso
+    se usa el <meta charset> de la página o UTF-8.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    encoding = None
+    if 'charset=' in content_type.lower():
+        encoding = response.encoding
+    else:
+        match = _META_CHARSET.search(response.content[:4096])
+        if match:
+            encoding = match.group(1).decode('ascii')
     try:
+        return response.content.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return response.content.decode('utf-8', errors='replace')
+
+def obtener_listado(indice, base_url=BASE_URL):
+    """
+    Descarga la página de ARCOTEL con GET condicional (ETag / Last-Modified).
+    Retorna la lista de href a Excel, o None si falla la conexión.
+    Con 304 reutiliza el listado guardado en el índice.
+    """
+    headers = dict(HEADERS)
+    if indice.get('etag'):
+        headers['If-None-Match'] = indice['etag']
+    if indice.get('last_modified'):
+        headers['If-Modified-Since'] = indice['last_modified']
 
+    print(f"Conectando a {base_url}...")
+    try:
         # Timeout added to prevent hanging ("atorarse")
-        response = requests.get(BASE_URL, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}, timeout=15)
+        response = requests.get(base_url, headers=headers, timeout=15)
+        if response.status_code == 304:
+            print(" - Listado sin cambios (304), se usa el índice local.")
+            return indice['hrefs']
         response.raise_for_status()
     except Exception as e:
-        print(f"ERROR CRÍTICO al conectar con {BASE_URL}")
+        print(f"ERROR CRÍTICO al conectar con {base_url}")
         print(f"Detalle: {e}")
+        return None
+
+    indice['etag'] = response.headers.get('ETag')
+    indice['last_modified'] = response.headers.get('Last-Modified')
+    return extraer_hrefs_excel(decodificar_html(response))
+
+def descargar_archivos_recientes(download_dir=None, base_url=None, clasificar=None,
+                                 tipos_requeridos=tuple(TIPOS_ARCHIVO)):
+    """
+    Descarga el juego completo más reciente del listado: un archivo por cada
+    tipo de tipos_requeridos (por defecto servicio y modalidad).
+    Los parámetros permiten reutilizarlo con otros reguladores (ver fuentes.py);
+    por defecto usa ARCOTEL y datos_descargados/.
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    base_url = base_url or BASE_URL
+    clasificar = clasificar or clasificar_enlace
+    index_path = os.path.join(download_dir, os.path.basename(INDEX_PATH))
+
+    # Crear carpeta si no existe
+    if not os.path.exists(download_dir):
+        os.makedirs(download_dir)
+
+    indice = cargar_indice(index_path)
+    hrefs = obtener_listado(indice, base_url)
+    if hrefs is None:
         return
 
-    soup = BeautifulSoup(response.content, 'html.parser')
-    links = soup.find_all('a', href=True)
-    
-    # Diccionario para agrupar: {(anio, mes): {'servicio': url, 'modalidad': url}}
-    disponibles = {}
+    nuevos = actualizar_indice(indice, hrefs, clasificar)
+    print(f" - {len(hrefs)} enlaces Excel en el listado, {nuevos} nuevos clasificados.")
+    guardar_indice(indice, index_path)
 
-    for link in links:
-        href = link['href']
-        nombre = os.path.basename(href)
-        
-        # Filtramos solo excels
-        if not (href.lower().endswith('.xlsx') or href.lower().endswith('.xls')):
-            continue
-            
-        anio, mes = obtener_fecha_desde_texto(nombre)
-        if anio == 0 or mes == 0:
-             # Intento con el href completo si el nombre falla
-             anio, mes = obtener_fecha_desde_texto(href)
-        
-        if anio > 0 and mes > 0:
-            tipo = identificar_tipo_archivo(nombre)
-            if tipo:
-                key = (anio, mes)
-                if key not in disponibles:
-                    disponibles[key] = {}
-                disponibles[key][tipo] = {'url': href, 'nombre': nombre}
+    # Diccionario para agrupar: {(anio, mes): {'servicio': url, 'modalidad': url}}
+    disponibles = agrupar_disponibles(indice)
 
     if not disponibles:
         print("No se encontraron archivos válidos.")
         return
 
-    # Buscar la fecha más reciente que tenga AMBOS archivos
+    # Buscar la fecha más reciente que tenga TODOS los archivos requeridos
     fechas_ordenadas = sorted(disponibles.keys(), reverse=True)
     
     ultima_fecha_completa = None
     for fecha in fechas_ordenadas:
         archivos = disponibles[fecha]
-        if 'servicio' in archivos and 'modalidad' in archivos:
+        if all(tipo in archivos for tipo in tipos_requeridos):
             ultima_fecha_completa = fecha
             break
     
     if not ultima_fecha_completa:
-        print("ADVERTENCIA: No se encontró ningun mes con el par completo (1.1.1 y 1.1.2).")
+        print(f"ADVERTENCIA: No se encontró ningun mes con el juego completo ({', '.join(tipos_requeridos)}).")
         print("Descargando lo más reciente disponible individualmente...")
         # Fallback: descargar lo más reciente que haya de cada uno
         # (Lógica simplificada para no bloquear: tomamos el top 1 de cada tipo si existe)
@@ -119,22 +257,19 @@ def descargar_archivos_recientes():
     anio_sel, mes_sel = ultima_fecha_completa
     print(f"\nFecha más reciente encontrada con datos completos: {mes_sel:02d}-{anio_sel}")
     
-    archivos_a_descargar = [
-        disponibles[ultima_fecha_completa]['servicio'],
-        disponibles[ultima_fecha_completa]['modalidad']
-    ]
+    archivos_a_descargar = [disponibles[ultima_fecha_completa][tipo] for tipo in tipos_requeridos]
     
     for archivo in archivos_a_descargar:
         nombre_final = archivo['nombre']
         url = archivo['url']
-        local_path = os.path.join(DOWNLOAD_DIR, nombre_final)
+        local_path = os.path.join(download_dir, nombre_final)
         
         print(f"Verificando {nombre_final}...")
         
         # Descargar siempre para verificar integridad o si cambió (se podría chequear size, pero overwrite es más seguro pre-commit)
         try:
             print(f" - Descargando de {url}...")
-            r = requests.get(url, stream=True)
+            r = requests.get(url, stream=True, headers=HEADERS, timeout=60)
             r.raise_for_status()
             with open(local_path, 'wb') as f:
                 for chunk in r.iter_content(chunk_size=8192):
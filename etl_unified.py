@@ -9,16 +9,24 @@ Procesa ambos archivos de Excel para generar los CSVs necesarios para el dashboa
 Salida:
 - output/lineas_por_servicio_long.csv
 - output/lineas_por_modalidad_fact.csv
-- output/validaciones_unificadas.csv
+- output/lineas_por_modalidad_long.csv
+- output/validaciones_cruzadas.csv (totales por empresa/mercado entre ambos reportes)
+
+Uso como librería (sin pasar por disco):
+    df = extract(path, report="servicios")   # o report="modalidad"
+    write_servicios(df, output_dir)           # escritores separados
 """
 
 from __future__ import annotations
 
 import os
 import re
+import threading
 import unicodedata
+from collections import OrderedDict
 from datetime import date
 
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
@@ -26,7 +34,8 @@ from openpyxl.utils import column_index_from_string
 # =========================
 # CONFIGURACIÓN GENERAL
 # =========================
-BASE_DIR = r"C:\Users\HP\OneDrive\JpE\Github\telefonia"
+# Por defecto la carpeta del repositorio; se puede sobrescribir con TELEFONIA_BASE_DIR
+BASE_DIR = os.environ.get("TELEFONIA_BASE_DIR", os.path.dirname(os.path.abspath(__file__)))
 DOWNLOAD_DIR = os.path.join(BASE_DIR, "datos_descargados")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 
@@ -57,15 +66,13 @@ FILE_2_BLOCKS = [
 ]
 FILE_2_FALLBACK_DATE = date(2008, 12, 1)
 
-def detect_latest_files():
-    """Busca en datos_descargados el par de archivos más reciente."""
-    print(f"Buscando archivos recientes en: {DOWNLOAD_DIR}")
-    
-    if not os.path.exists(DOWNLOAD_DIR):
-        print(f"ERROR: No existe el directorio {DOWNLOAD_DIR}")
-        return None, None
+def scan_downloaded_files(download_dir: str = None) -> dict:
+    """Clasifica los xlsx descargados: {(anio, mes): {'servicio': path, 'modalidad': path}}."""
+    download_dir = download_dir or DOWNLOAD_DIR
+    if not os.path.exists(download_dir):
+        return {}
 
-    files = [f for f in os.listdir(DOWNLOAD_DIR) if f.lower().endswith('.xlsx')]
+    files = [f for f in os.listdir(download_dir) if f.lower().endswith('.xlsx')]
     
     # Regex para extraer fecha
     # Soporta: 1.1.1..._octubre_2025.xlsx o formatos similares
@@ -79,7 +86,7 @@ def detect_latest_files():
     }
     
     for f in files:
-        path = os.path.join(DOWNLOAD_DIR, f)
+        path = os.path.join(download_dir, f)
         
         # Identificar tipo
         tipo = None
@@ -107,6 +114,28 @@ def detect_latest_files():
                     mapa_fechas[key] = {}
                 mapa_fechas[key][tipo] = path
 
+    return mapa_fechas
+
+def complete_vintages(download_dir: str = None) -> list[tuple[tuple[int, int], str, str]]:
+    """Todas las fechas con par completo, ordenadas: [((anio, mes), servicio, modalidad), ...]."""
+    mapa_fechas = scan_downloaded_files(download_dir)
+    return [
+        (fecha, archivos['servicio'], archivos['modalidad'])
+        for fecha, archivos in sorted(mapa_fechas.items())
+        if 'servicio' in archivos and 'modalidad' in archivos
+    ]
+
+def detect_latest_files(download_dir: str = None):
+    """Busca en datos_descargados el par de archivos más reciente."""
+    download_dir = download_dir or DOWNLOAD_DIR
+    print(f"Buscando archivos recientes en: {download_dir}")
+    
+    if not os.path.exists(download_dir):
+        print(f"ERROR: No existe el directorio {download_dir}")
+        return None, None
+
+    mapa_fechas = scan_downloaded_files(download_dir)
+
     # Buscar la fecha más alta que tenga ambos
     fechas_ordenadas = sorted(mapa_fechas.keys(), reverse=True)
     
@@ -198,44 +227,150 @@ def _cell(ws, col_letter: str, row: int):
     return ws.cell(row=row, column=column_index_from_string(col_letter)).value
 
 
+# =========================
+# NORMALIZACIÓN DE ETIQUETAS
+# =========================
+
+# Etiqueta canónica -> variantes conocidas en los headers de ARCOTEL.
+# Las variantes se comparan ya normalizadas (_normalize_text: minúsculas,
+# sin tildes, espacios colapsados), así que basta con listar cambios de texto.
+# Son propias de ARCOTEL: extract() las aplica solo con REPORT_LAYOUTS; otros
+# mercados pasan las suyas (ver fuentes.SourceAdapter.category_map/company_map).
+CANONICAL_CATEGORIES = {
+    "TELEFONIA": ["telefonia", "solo telefonia"],
+    "TELEFONIA E INTERNET": ["telefonia e internet", "telefonia + internet", "telefonia y internet"],
+    "INTERNET": ["internet", "solo internet"],
+    "DATOS": ["datos", "solo datos"],
+    "PREPAGO": ["prepago"],
+    "POSPAGO": ["pospago", "postpago"],
+    "TTUP": ["ttup"],
+    "TOTAL_EMPRESA": ["total_empresa", "total empresa"],
+    "TOTAL_MERCADO": ["total_mercado", "total mercado"],
+    "CHECK_SUM_SERVICIOS": [],
+    "CHECK_SUM_MODALIDADES": [],
+    "CHECK_SUM_TOTALES_EMPRESA": [],
+}
+
+# Solo variantes de la razón social; marca -> razón social es trabajo del
+# operator_map de cada adaptador.
+CANONICAL_COMPANIES = {
+    "CONECEL S.A.": ["conecel", "conecel s.a", "conecel sa"],
+    "OTECEL S.A.": ["otecel", "otecel s.a", "otecel sa"],
+    "CNT EP": ["cnt", "cnt e.p.", "cnt e.p"],
+    "TOTAL_MERCADO": ["total_mercado", "total mercado"],
+}
+
+def build_canonical_map(canonical: dict) -> dict:
+    """Precalcula {texto normalizado: etiqueta canónica} incluyendo la propia etiqueta."""
+    lookup = {}
+    for label, variants in canonical.items():
+        for v in [label, *variants]:
+            lookup[_normalize_text(v)] = label
+    return lookup
+
+
+def _remap_categorical(values: pd.Series, lookup: dict, canonical_order: list):
+    """
+    Remapea una columna de texto vía categorías: solo se normaliza cada etiqueta
+    distinta una vez y las filas se traducen por código. Retorna (Categorical, sin_mapeo).
+    """
+    cat = pd.Categorical(values)
+    mapped, unmapped = [], []
+    for label in cat.categories:
+        canon = lookup.get(_normalize_text(str(label)))
+        if canon is None:
+            unmapped.append(label)
+            canon = label
+        mapped.append(canon)
+
+    # Orden de categorías estable entre corridas: canónicas primero, luego las nuevas
+    extra = sorted(set(unmapped) - set(canonical_order))
+    categories = list(canonical_order) + extra
+    codes_map = np.array([categories.index(m) for m in mapped] + [-1], dtype=np.int32)
+    return pd.Categorical.from_codes(codes_map[cat.codes], categories=categories), unmapped
+
+def normalize_labels(df: pd.DataFrame, category_map: dict = None, company_map: dict = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Lleva company/category a su etiqueta canónica como columnas categóricas
+    con códigos estables. Retorna (df, {columna: [etiquetas sin mapeo]}).
+
+    category_map / company_map: {canónica: [variantes]}; por defecto los de
+    ARCOTEL. Con un mapa vacío la columna pasa a categórica sin remapear.
+    """
+    maps = {
+        "category": CANONICAL_CATEGORIES if category_map is None else category_map,
+        "company": CANONICAL_COMPANIES if company_map is None else company_map,
+    }
+    df = df.copy()
+    unmapped = {}
+    for col, canonical in maps.items():
+        if col not in df.columns:
+            continue
+        if not canonical:
+            df[col] = df[col].astype("category")
+            continue
+        df[col], missing = _remap_categorical(df[col], build_canonical_map(canonical), list(canonical))
+        if missing:
+            unmapped[col] = missing
+    return df, unmapped
+
+
 # =========================
 # LÓGICA DE PROCESAMIENTO
 # =========================
 
-def process_servicios(input_path):
-    print(f"\n--- Procesando Servicios ---")
-    print(f"Archivo: {os.path.basename(input_path)}")
-    
-    if not os.path.exists(input_path):
-        print(f"ERROR: No se encontró {input_path}")
-        return
+# Layout de cada reporte (hoja, filas, columnas y nombre del check por empresa)
+REPORT_LAYOUTS = {
+    "servicios": {
+        "sheet": FILE_1_SHEET,
+        "header_row": FILE_1_HEADER_ROW,
+        "start_row": FILE_1_START_ROW,
+        "date_col": FILE_1_DATE_COL,
+        "total_col": FILE_1_TOTAL_COL,
+        "blocks": FILE_1_BLOCKS,
+        "fallback_date": FILE_1_FALLBACK_DATE,
+        "check_category": "CHECK_SUM_SERVICIOS",
+    },
+    "modalidad": {
+        "sheet": FILE_2_SHEET,
+        "header_row": FILE_2_HEADER_ROW,
+        "start_row": FILE_2_START_ROW,
+        "date_col": FILE_2_DATE_COL,
+        "total_col": FILE_2_TOTAL_COL,
+        "blocks": FILE_2_BLOCKS,
+        "fallback_date": FILE_2_FALLBACK_DATE,
+        "check_category": "CHECK_SUM_MODALIDADES",
+    },
+}
+
+def _to_float(val) -> float:
+    if val is None:
+        return 0.0
+    try:
+        return float(val)
+    except Exception:
+        return 0.0
+
+def _extract_records(ws, layout: dict, source: str) -> list[dict]:
+    # Nombres de categorías (headers): el bloque de CONECEL es el canónico
+    categories = []
+    for c in layout["blocks"][0][1]:
+        v = _cell(ws, c, layout["header_row"])
+        categories.append(str(v).strip() if v is not None else c)
 
-    wb = load_workbook(input_path, data_only=True)
-    if FILE_1_SHEET not in wb.sheetnames:
-        print(f"ERROR: Hoja '{FILE_1_SHEET}' no encontrada.")
-        return
-    ws = wb[FILE_1_SHEET]
-
-    # Detectar Nombres de Servicios (Headers)
-    services = []
-    # Usamos el bloque de CONECEL (B-E) para nombres canónicos
-    for c in FILE_1_BLOCKS[0][1]:
-        v = _cell(ws, c, FILE_1_HEADER_ROW)
-        services.append(str(v).strip() if v is not None else c)
-    
     # Fecha Inicio
-    raw_start = _cell(ws, FILE_1_DATE_COL, FILE_1_START_ROW)
+    raw_start = _cell(ws, layout["date_col"], layout["start_row"])
     parsed_start = _parse_month_year(raw_start)
-    start_date = parsed_start if parsed_start is not None else FILE_1_FALLBACK_DATE
+    start_date = parsed_start if parsed_start is not None else layout["fallback_date"]
 
     records = []
-    r = FILE_1_START_ROW
+    r = layout["start_row"]
     month_idx = 0
     empty_streak = 0
 
-    while empty_streak < 3 and r < FILE_1_START_ROW + 3000:
-        raw_date = _cell(ws, FILE_1_DATE_COL, r)
-        total_mercado = _cell(ws, FILE_1_TOTAL_COL, r)
+    while empty_streak < 3 and r < layout["start_row"] + 3000:
+        raw_date = _cell(ws, layout["date_col"], r)
+        total_mercado = _cell(ws, layout["total_col"], r)
 
         if raw_date is None and total_mercado is None:
             empty_streak += 1
@@ -244,164 +379,272 @@ def process_servicios(input_path):
         empty_streak = 0
 
         current_date = _add_months(start_date, month_idx)
-        
+
         # Procesar bloques empresas
         sum_total_empresas = 0.0
-        for company_name, service_cols, total_col in FILE_1_BLOCKS:
+        for company_name, cols, total_col in layout["blocks"]:
             company_sum = 0.0
-            for svc_name, col_letter in zip(services, service_cols):
-                val = _cell(ws, col_letter, r)
-                vnum = 0.0
-                if val is not None:
-                    try: vnum = float(val)
-                    except: pass
-                
+            for cat_name, col_letter in zip(categories, cols):
+                vnum = _to_float(_cell(ws, col_letter, r))
                 company_sum += vnum
                 records.append({
                     "date": current_date,
                     "company": company_name,
-                    "category": svc_name,
+                    "category": cat_name,
                     "value": vnum,
-                    "source": "servicios"
+                    "source": source
                 })
-            
+
             # Total empresa declarado
-            tot_val = _cell(ws, total_col, r)
-            tot_decl = 0.0
-            if tot_val is not None:
-                try: tot_decl = float(tot_val)
-                except: pass
+            tot_decl = _to_float(_cell(ws, total_col, r))
             sum_total_empresas += tot_decl
 
-            records.append({"date": current_date, "company": company_name, "category": "TOTAL_EMPRESA", "value": tot_decl, "source": "servicios"})
-            records.append({"date": current_date, "company": company_name, "category": "CHECK_SUM_SERVICIOS", "value": company_sum, "source": "servicios"})
+            records.append({"date": current_date, "company": company_name, "category": "TOTAL_EMPRESA", "value": tot_decl, "source": source})
+            records.append({"date": current_date, "company": company_name, "category": layout["check_category"], "value": company_sum, "source": source})
 
         # Total Mercado
-        merc_val = 0.0
-        if total_mercado is not None:
-            try: merc_val = float(total_mercado)
-            except: pass
-        
-        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "TOTAL_MERCADO", "value": merc_val, "source": "servicios"})
-        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "CHECK_SUM_TOTALES_EMPRESA", "value": sum_total_empresas, "source": "servicios"})
+        merc_val = _to_float(total_mercado)
+        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "TOTAL_MERCADO", "value": merc_val, "source": source})
+        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "CHECK_SUM_TOTALES_EMPRESA", "value": sum_total_empresas, "source": source})
 
         r += 1
         month_idx += 1
 
-    df = pd.DataFrame(records)
-    out_path = os.path.join(OUTPUT_DIR, "lineas_por_servicio_long.csv")
-    df.to_csv(out_path, index=False, encoding="utf-8-sig")
-    print(f"Generado: {out_path} ({len(df)} registros)")
-
-def process_modalidad(input_path):
-    print(f"\n--- Procesando Modalidad ---")
-    print(f"Archivo: {os.path.basename(input_path)}")
-    
-    if not os.path.exists(input_path):
-        print(f"ERROR: No se encontró {input_path}")
-        return
-
+    return records
+
+# Caché en memoria de extracciones por libro dentro del mismo proceso. El
+# pipeline no la necesita (main() entrega los DataFrames a pronósticos y shards);
+# sirve a quien vuelve a pedir el mismo libro: cross_check_archive(), notebooks,
+# fuentes.run_adapter.
+# Clave: (ruta absoluta, mtime_ns, tamaño, layout); si el archivo cambia en disco
+# la clave cambia y la entrada vieja termina expulsada por LRU.
+EXTRACT_CACHE_SIZE = 8
+_EXTRACT_CACHE: OrderedDict = OrderedDict()
+_EXTRACT_CACHE_LOCK = threading.Lock()
+
+def _cache_key(input_path, report: str, layout: dict, label_maps: tuple = ()) -> tuple:
+    st = os.stat(input_path)
+    return (os.path.abspath(input_path), st.st_mtime_ns, st.st_size, report,
+            repr(sorted(layout.items())), repr(label_maps))
+
+def clear_extract_cache(input_path=None) -> int:
+    """
+    Invalida la caché de extracción. Sin argumentos la vacía por completo;
+    con una ruta elimina solo las entradas de ese archivo. Retorna cuántas se borraron.
+    """
+    with _EXTRACT_CACHE_LOCK:
+        if input_path is None:
+            n = len(_EXTRACT_CACHE)
+            _EXTRACT_CACHE.clear()
+            return n
+        abs_path = os.path.abspath(input_path)
+        keys = [k for k in _EXTRACT_CACHE if k[0] == abs_path]
+        for k in keys:
+            del _EXTRACT_CACHE[k]
+        return len(keys)
+
+def _read_workbook(input_path, report: str, layout: dict,
+                   category_map: dict = None, company_map: dict = None) -> pd.DataFrame:
     wb = load_workbook(input_path, data_only=True)
-    if FILE_2_SHEET not in wb.sheetnames:
-        print(f"ERROR: Hoja '{FILE_2_SHEET}' no encontrada.")
-        return
-    ws = wb[FILE_2_SHEET]
-
-    # Headers de Modalidades
-    modalities = []
-    for c in FILE_2_BLOCKS[0][1]:
-        v = _cell(ws, c, FILE_2_HEADER_ROW)
-        modalities.append(str(v).strip() if v is not None else c)
-
-    # Fecha Inicio
-    raw_start = _cell(ws, FILE_2_DATE_COL, FILE_2_START_ROW)
-    parsed_start = _parse_month_year(raw_start)
-    start_date = parsed_start if parsed_start is not None else FILE_2_FALLBACK_DATE
-
-    records = []
-    r = FILE_2_START_ROW
-    month_idx = 0
-    empty_streak = 0
+    if layout["sheet"] not in wb.sheetnames:
+        raise ValueError(f"Hoja '{layout['sheet']}' no encontrada.")
+    ws = wb[layout["sheet"]]
+    df, unmapped = normalize_labels(pd.DataFrame(_extract_records(ws, layout, report)),
+                                    category_map, company_map)
+    for col, labels in unmapped.items():
+        print(f"ADVERTENCIA: {os.path.basename(input_path)}: {col} sin mapeo canónico: {labels}")
+    return df
+
+def extract(input_path, report: str, use_cache: bool = True, layouts: dict = None,
+            category_map: dict = None, company_map: dict = None) -> pd.DataFrame:
+    """
+    Extrae un reporte de ARCOTEL en formato largo, sin escribir a disco.
+
+    report: "servicios" (1.1.1) o "modalidad" (1.1.2).
+    Columnas: date, company, category, value, source (incluye filas CHECK_*).
+    Con use_cache=True reutiliza la extracción previa del mismo archivo
+    (ver clear_extract_cache). Siempre retorna una copia independiente.
+    layouts permite pasar otro juego de layouts (otros reguladores, ver fuentes.py).
+    category_map / company_map: {canónica: [variantes]} para normalize_labels.
+    Los de ARCOTEL solo se aplican por defecto con REPORT_LAYOUTS; con otros
+    layouts, sin mapas no se remapea nada.
+    Lanza FileNotFoundError / ValueError si el archivo u hoja no existen.
+    """
+    if layouts is None:
+        layouts = REPORT_LAYOUTS
+    if layouts is REPORT_LAYOUTS:
+        category_map = CANONICAL_CATEGORIES if category_map is None else category_map
+        company_map = CANONICAL_COMPANIES if company_map is None else company_map
+    else:
+        category_map = category_map or {}
+        company_map = company_map or {}
+    if report not in layouts:
+        raise ValueError(f"Reporte desconocido '{report}'. Opciones: {sorted(layouts)}")
+    layout = layouts[report]
 
-    while empty_streak < 3 and r < FILE_2_START_ROW + 3000:
-        raw_date = _cell(ws, FILE_2_DATE_COL, r)
-        total_mercado = _cell(ws, FILE_2_TOTAL_COL, r)
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"No se encontró {input_path}")
+
+    if not use_cache or EXTRACT_CACHE_SIZE <= 0:
+        return _read_workbook(input_path, report, layout, category_map, company_map)
+
+    key = _cache_key(input_path, report, layout, (category_map, company_map))
+    with _EXTRACT_CACHE_LOCK:
+        df = _EXTRACT_CACHE.get(key)
+        if df is not None:
+            _EXTRACT_CACHE.move_to_end(key)
+            return df.copy()
+
+    # Se lee fuera del lock: abrir el xlsx es lo lento
+    df = _read_workbook(input_path, report, layout, category_map, company_map)
+    with _EXTRACT_CACHE_LOCK:
+        _EXTRACT_CACHE[key] = df
+        _EXTRACT_CACHE.move_to_end(key)
+        while len(_EXTRACT_CACHE) > EXTRACT_CACHE_SIZE:
+            _EXTRACT_CACHE.popitem(last=False)
+    return df.copy()
+
+def fact_view(df_long: pd.DataFrame) -> pd.DataFrame:
+    """Versión "Fact" limpia para dashboard (sin checks)."""
+    return df_long[~df_long["category"].str.startswith("CHECK_")].copy()
+
+def write_servicios(df: pd.DataFrame, output_dir: str = None) -> str:
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    out_path = os.path.join(output_dir, "lineas_por_servicio_long.csv")
+    df.to_csv(out_path, index=False, encoding="utf-8-sig")
+    print(f"Generado: {out_path} ({len(df)} registros)")
+    return out_path
 
-        if raw_date is None and total_mercado is None:
-            empty_streak += 1
-            r += 1
-            continue
-        empty_streak = 0
+def write_modalidad(df_long: pd.DataFrame, output_dir: str = None) -> tuple[str, str]:
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    out_path_long = os.path.join(output_dir, "lineas_por_modalidad_long.csv")
+    out_path_fact = os.path.join(output_dir, "lineas_por_modalidad_fact.csv")
 
-        current_date = _add_months(start_date, month_idx)
-        
-        sum_total_empresas = 0.0
-        for company_name, mod_cols, total_col in FILE_2_BLOCKS:
-            company_sum = 0.0
-            for mod_name, col_letter in zip(modalities, mod_cols):
-                val = _cell(ws, col_letter, r)
-                vnum = 0.0
-                if val is not None:
-                    try: vnum = float(val)
-                    except: pass
-                
-                company_sum += vnum
-                records.append({
-                    "date": current_date,
-                    "company": company_name,
-                    "category": mod_name,
-                    "value": vnum,
-                    "source": "modalidad"
-                })
-            
-            tot_val = _cell(ws, total_col, r)
-            tot_decl = 0.0
-            if tot_val is not None:
-                try: tot_decl = float(tot_val)
-                except: pass
-            sum_total_empresas += tot_decl
+    df_long.to_csv(out_path_long, index=False, encoding="utf-8-sig")
+    fact_view(df_long).to_csv(out_path_fact, index=False, encoding="utf-8-sig")
 
-            records.append({"date": current_date, "company": company_name, "category": "TOTAL_EMPRESA", "value": tot_decl, "source": "modalidad"})
-            records.append({"date": current_date, "company": "CHECK_SUM_MODALIDADES", "value": company_sum, "source": "modalidad"})
+    print(f"Generado: {out_path_long} ({len(df_long)} registros)")
+    print(f"Generado: {out_path_fact} (Optimizado Dashboard)")
+    return out_path_long, out_path_fact
 
-        merc_val = 0.0
-        if total_mercado is not None:
-            try: merc_val = float(total_mercado)
-            except: pass
-            
-        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "TOTAL_MERCADO", "value": merc_val, "source": "modalidad"})
-        records.append({"date": current_date, "company": "TOTAL_MERCADO", "category": "CHECK_SUM_TOTALES_EMPRESA", "value": sum_total_empresas, "source": "modalidad"})
+# =========================
+# VALIDACIÓN CRUZADA SERVICIOS vs MODALIDAD
+# =========================
 
-        r += 1
-        month_idx += 1
+CROSS_CHECK_TOLERANCE = 0.5
+CROSS_CHECK_CATEGORIES = ["TOTAL_EMPRESA", "TOTAL_MERCADO"]
+_CROSS_CHECK_KEYS = ["vintage", "date", "company", "category"]
 
-    df_long = pd.DataFrame(records)
-    # Generar versión "Fact" limpia para dashboard (sin checks)
-    df_fact = df_long[~df_long["category"].str.startswith("CHECK_")].copy()
-    
-    out_path_long = os.path.join(OUTPUT_DIR, "lineas_por_modalidad_long.csv")
-    out_path_fact = os.path.join(OUTPUT_DIR, "lineas_por_modalidad_fact.csv")
-    
-    df_long.to_csv(out_path_long, index=False, encoding="utf-8-sig")
-    df_fact.to_csv(out_path_fact, index=False, encoding="utf-8-sig")
-    
-    print(f"Generado: {out_path_long} ({len(df_long)} registros)")
-    print(f"Generado: {out_path_fact} (Optimizado Dashboard)")
+def _totals(df: pd.DataFrame, vintage) -> pd.DataFrame:
+    out = df.loc[df["category"].isin(CROSS_CHECK_CATEGORIES), ["date", "company", "category", "value"]].copy()
+    if "vintage" in df.columns:
+        out["vintage"] = df.loc[out.index, "vintage"]
+    else:
+        out["vintage"] = vintage
+    return out
+
+def cross_check(df_servicios: pd.DataFrame, df_modalidad: pd.DataFrame,
+                vintage=None, tolerance: float = CROSS_CHECK_TOLERANCE) -> pd.DataFrame:
+    """
+    Compara TOTAL_EMPRESA y TOTAL_MERCADO declarados en ambos reportes.
+
+    Une por (vintage, date, company, category) solo los meses presentes en
+    ambos (servicios arranca en 2014-07). Si los DataFrames traen columna
+    "vintage" se comparan todas las ediciones en una sola pasada.
+    Retorna una fila por par con value_servicios, value_modalidad, diff,
+    diff_pct y discrepancy (|diff| > tolerance). Meses en cero en ambos
+    reportes (filas futuras vacías) se descartan.
+    """
+    merged = _totals(df_servicios, vintage).merge(
+        _totals(df_modalidad, vintage),
+        on=_CROSS_CHECK_KEYS, how="inner", suffixes=("_servicios", "_modalidad"),
+    )
+    merged = merged[(merged["value_servicios"] != 0) | (merged["value_modalidad"] != 0)]
+
+    merged["diff"] = merged["value_servicios"] - merged["value_modalidad"]
+    base = merged["value_modalidad"].where(merged["value_modalidad"] != 0)
+    merged["diff_pct"] = merged["diff"] / base * 100
+    merged["discrepancy"] = merged["diff"].abs() > tolerance
+    return merged.sort_values(_CROSS_CHECK_KEYS).reset_index(drop=True)[
+        _CROSS_CHECK_KEYS + ["value_servicios", "value_modalidad", "diff", "diff_pct", "discrepancy"]
+    ]
+
+def cross_check_archive(download_dir: str = None, tolerance: float = CROSS_CHECK_TOLERANCE) -> pd.DataFrame:
+    """Validación cruzada de todas las ediciones con par completo en datos_descargados."""
+    serv, mod = [], []
+    for (anio, mes), f_serv, f_mod in complete_vintages(download_dir):
+        vintage = f"{anio:04d}-{mes:02d}"
+        serv.append(extract(f_serv, "servicios").assign(vintage=vintage))
+        mod.append(extract(f_mod, "modalidad").assign(vintage=vintage))
+    if not serv:
+        return cross_check(pd.DataFrame(columns=["date", "company", "category", "value"]),
+                           pd.DataFrame(columns=["date", "company", "category", "value"]))
+    return cross_check(pd.concat(serv, ignore_index=True), pd.concat(mod, ignore_index=True),
+                       tolerance=tolerance)
+
+def write_cross_check(df_check: pd.DataFrame, output_dir: str = None) -> str:
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    out_path = os.path.join(output_dir, "validaciones_cruzadas.csv")
+    df_check.to_csv(out_path, index=False, encoding="utf-8-sig")
+
+    bad = df_check[df_check["discrepancy"]]
+    print(f"Generado: {out_path} ({len(bad)} discrepancias de {len(df_check)} comparaciones)")
+    if not bad.empty:
+        print("\nALERTA. Totales distintos entre servicios y modalidad. Primeras filas:")
+        print(bad[["vintage", "date", "company", "diff"]].head(20).to_string(index=False))
+    return out_path
+
+def _process(input_path, report: str, titulo: str):
+    print(f"\n--- Procesando {titulo} ---")
+    print(f"Archivo: {os.path.basename(input_path)}")
+    try:
+        return extract(input_path, report)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return None
 
-def main():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+def process_servicios(input_path, output_dir: str = None):
+    df = _process(input_path, "servicios", "Servicios")
+    if df is not None:
+        write_servicios(df, output_dir)
+    return df
+
+def process_modalidad(input_path, output_dir: str = None):
+    df_long = _process(input_path, "modalidad", "Modalidad")
+    if df_long is not None:
+        write_modalidad(df_long, output_dir)
+    return df_long
+
+def main(download_dir: str = None, output_dir: str = None):
+    """
+    Procesa el par más reciente. Retorna {"servicios": df, "modalidad": df}
+    con los reportes extraídos para que las etapas siguientes (pronósticos,
+    shards) no relean los CSV, o None si no hubo archivos que procesar.
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
         
     print("Iniciando procesamiento ETL Auto-Detect...")
     
-    f1, f2 = detect_latest_files()
+    f1, f2 = detect_latest_files(download_dir)
     
     if f1 and f2:
-        process_servicios(f1)
-        process_modalidad(f2)
+        df_serv = process_servicios(f1, output_dir)
+        df_mod = process_modalidad(f2, output_dir)
+        if df_serv is not None and df_mod is not None:
+            print("\n--- Validación cruzada Servicios vs Modalidad ---")
+            vintage = next((f"{anio:04d}-{mes:02d}" for (anio, mes), fs, _ in complete_vintages(download_dir) if fs == f1), None)
+            write_cross_check(cross_check(df_serv, df_mod, vintage=vintage), output_dir)
         print("\nPROCESO FINALIZADO EXITOSAMENTE.")
+        frames = {"servicios": df_serv, "modalidad": df_mod}
+        return {k: v for k, v in frames.items() if v is not None}
     else:
         print("\nABORTADO: No se pudieron determinar los archivos a procesar.")
+        return None
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Pronósticos en batch para todas las series del dashboard.
+
+Corre después de etl_unified: toma los reportes ya extraídos (o los CSV de
+output/), corta cada fuente en el último mes con TOTAL_MERCADO > 0 (misma regla
+que app.js) y ajusta dos modelos ligeros para cada serie (source, company,
+category):
+
+- seasonal_naive: repite el valor de hace 12 meses.
+- holt: suavizamiento exponencial con tendencia aditiva; alpha/beta se eligen
+  por serie en una grilla minimizando el error a un paso.
+
+Todas las series de una fuente se ajustan a la vez como una matriz
+(series x meses) con numpy, así que cientos de series toman milisegundos.
+
+Salida:
+- output/pronosticos.csv (date, company, category, source, model, horizon,
+  forecast, lower, upper)
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import etl_unified
+
+FORECAST_HORIZON = 12
+SEASON_LENGTH = 12
+# z para intervalos al 95 %
+INTERVAL_Z = 1.96
+HOLT_ALPHAS = np.linspace(0.05, 1.0, 20)
+HOLT_BETAS = np.linspace(0.0, 0.5, 11)
+
+# reporte (clave de etl_unified.extract) -> CSV de output/
+INPUT_FILES = {
+    "servicios": "lineas_por_servicio_long.csv",
+    "modalidad": "lineas_por_modalidad_fact.csv",
+}
+
+
+def _series_matrix(df: pd.DataFrame):
+    """
+    Pivotea una fuente a matriz (series x meses) hasta el último mes válido.
+    Retorna (keys DataFrame, fechas, Y) o None si no hay datos.
+    """
+    df = df[~df["category"].str.startswith("CHECK_")]
+    # Etiquetas como texto: con categóricas pivot_table podría generar combinaciones vacías
+    df = df.assign(date=pd.to_datetime(df["date"]),
+                   company=df["company"].astype(str), category=df["category"].astype(str))
+
+    validos = df[(df["category"] == "TOTAL_MERCADO") & (df["value"] > 0)]
+    if not validos.empty:
+        df = df[df["date"] <= validos["date"].max()]
+    if df.empty:
+        return None
+
+    wide = df.pivot_table(index=["source", "company", "category"], columns="date",
+                          values="value", aggfunc="first").sort_index(axis=1)
+    Y = wide.to_numpy(dtype=np.float64)
+    # Huecos puntuales: arrastrar el último valor conocido, y 0 antes del primero
+    Y = pd.DataFrame(Y).ffill(axis=1).fillna(0.0).to_numpy()
+    return wide.index.to_frame(index=False), wide.columns, Y
+
+
+def seasonal_naive(Y: np.ndarray, horizon: int, season: int = SEASON_LENGTH):
+    """Pronóstico + desviación estándar por horizonte, shape (n, horizon)."""
+    n, T = Y.shape
+    if T <= season:
+        return None
+    h = np.arange(horizon)
+    fc = Y[:, T - season + (h % season)]
+    resid = Y[:, season:] - Y[:, :-season]
+    sigma = np.sqrt(np.mean(resid ** 2, axis=1))
+    k = h // season + 1
+    return fc, sigma[:, None] * np.sqrt(k)[None, :]
+
+
+def holt(Y: np.ndarray, horizon: int, alphas=HOLT_ALPHAS, betas=HOLT_BETAS):
+    """
+    Holt lineal ajustado para todas las series y toda la grilla (alpha, beta) a la vez.
+    Retorna (pronóstico, desviación estándar, alpha, beta); cada uno por serie.
+    """
+    n, T = Y.shape
+    if T < 3:
+        return None
+    a = np.repeat(alphas, len(betas))[None, :]
+    b_ = np.tile(betas, len(alphas))[None, :]
+
+    level = np.repeat(Y[:, :1], a.shape[1], axis=1)
+    trend = np.repeat(Y[:, 1:2] - Y[:, :1], a.shape[1], axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, T):
+        pred = level + trend
+        err = Y[:, t:t + 1] - pred
+        sse += err ** 2
+        level = pred + a * err
+        trend = trend + a * b_ * err
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(n)
+    alpha, beta = a[0, best], b_[0, best]
+    level, trend = level[rows, best], trend[rows, best]
+    sigma = np.sqrt(sse[rows, best] / (T - 1))
+
+    h = np.arange(1, horizon + 1)
+    fc = level[:, None] + h[None, :] * trend[:, None]
+    # Var(h) = sigma^2 * (1 + sum_{j<h} (alpha * (1 + j * beta))^2)
+    j = np.arange(horizon)
+    c = (alpha[:, None] * (1 + j[None, :] * beta[:, None])) ** 2
+    c[:, 0] = 0.0
+    var_factor = 1 + np.cumsum(c, axis=1)
+    return fc, sigma[:, None] * np.sqrt(var_factor), alpha, beta
+
+
+def forecast_frame(df: pd.DataFrame, horizon: int = FORECAST_HORIZON) -> pd.DataFrame:
+    """Pronósticos con intervalos para todas las series de un DataFrame largo (una o varias fuentes)."""
+    out = []
+    for _, df_src in df.groupby("source", sort=True):
+        matrix = _series_matrix(df_src)
+        if matrix is None:
+            continue
+        keys, dates, Y = matrix
+        future = pd.date_range(dates[-1] + pd.offsets.MonthBegin(1), periods=horizon, freq="MS")
+
+        modelos = {}
+        sn = seasonal_naive(Y, horizon)
+        if sn is not None:
+            modelos["seasonal_naive"] = sn
+        ht = holt(Y, horizon)
+        if ht is not None:
+            modelos["holt"] = ht[:2]
+
+        for model, (fc, sd) in modelos.items():
+            lower = np.clip(fc - INTERVAL_Z * sd, 0, None)
+            upper = fc + INTERVAL_Z * sd
+            n = len(keys)
+            out.append(pd.DataFrame({
+                "date": np.tile(future.strftime("%Y-%m-%d"), n),
+                "company": np.repeat(keys["company"].to_numpy(), horizon),
+                "category": np.repeat(keys["category"].to_numpy(), horizon),
+                "source": np.repeat(keys["source"].to_numpy(), horizon),
+                "model": model,
+                "horizon": np.tile(np.arange(1, horizon + 1), n),
+                "forecast": np.clip(fc, 0, None).ravel(),
+                "lower": lower.ravel(),
+                "upper": upper.ravel(),
+            }))
+
+    if not out:
+        return pd.DataFrame(columns=["date", "company", "category", "source", "model",
+                                     "horizon", "forecast", "lower", "upper"])
+    return pd.concat(out, ignore_index=True)
+
+
+def main(output_dir: str = None, horizon: int = FORECAST_HORIZON, frames: dict = None):
+    """
+    frames: {reporte: DataFrame} ya extraídos (ver etl_unified.main); los
+    reportes que no estén ahí se leen de los CSV de output_dir.
+    """
+    output_dir = output_dir or etl_unified.OUTPUT_DIR
+    print("\n--- Pronósticos ---")
+
+    frames = _read_inputs(output_dir, frames or {})
+    if not frames:
+        print("ABORTADO: no hay datos para pronosticar.")
+        return None
+
+    df_fc = forecast_frame(pd.concat(frames, ignore_index=True), horizon)
+    out_path = os.path.join(output_dir, "pronosticos.csv")
+    df_fc.to_csv(out_path, index=False, encoding="utf-8-sig")
+    n_series = len(df_fc[["source", "company", "category"]].drop_duplicates())
+    print(f"Generado: {out_path} ({n_series} series, {horizon} meses)")
+    return out_path
+
+
+def _read_inputs(output_dir: str, frames: dict) -> list:
+    out = []
+    for report, name in INPUT_FILES.items():
+        if report in frames:
+            out.append(frames[report])
+            continue
+        path = os.path.join(output_dir, name)
+        if not os.path.exists(path):
+            print(f"ERROR: No se encontró {path}")
+            continue
+        out.append(pd.read_csv(path, encoding="utf-8-sig"))
+    return out
+
+
+if __name__ == "__main__":
+    main(horizon=int(sys.argv[1]) if len(sys.argv) > 1 else FORECAST_HORIZON)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptadores de fuentes por mercado/regulador.
+
+Cada mercado se describe con un SourceAdapter:
+- listado y descarga (scraper del regulador)
+- clasificador de archivos: nombre -> (tipo, año, mes)
+- layouts de los reportes (mismo formato que etl_unified.REPORT_LAYOUTS)
+- etiquetas canónicas de categorías y empresas (formato de
+  etl_unified.CANONICAL_CATEGORIES), propias de cada mercado
+- mapeo de operadores: nombre en el reporte -> nombre canónico
+
+run_adapters() descarga los mercados en hilos (I/O de red) y extrae cada
+(mercado, edición, reporte) en procesos separados, ya que openpyxl es Python
+puro y retiene el GIL. Todo se escribe en un almacén particionado compartido:
+
+    store/market=<codigo>/report=<reporte>/vintage=<AAAA-MM>.csv
+
+Agregar un mercado = subclasificar SourceAdapter con sus atributos (URL,
+carpeta, meses, patrones de archivo, layouts, etiquetas, operadores) y llamar
+register_adapter(), que rechaza adaptadores sin URL, carpeta, reportes o layouts.
+Los adaptadores deben ser picklables (clases a nivel de módulo).
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import descargar_data
+import etl_unified
+
+STORE_DIR = os.path.join(etl_unified.BASE_DIR, "store")
+MAX_WORKERS = 4
+
+
+class SourceAdapter:
+    """
+    Interfaz base. Las subclases definen los atributos; classify() y download()
+    usan el scraper genérico de descargar_data con esos atributos y solo hace
+    falta sobrescribirlos si el regulador publica de otra forma.
+    """
+
+    code: str = ""            # identificador del mercado, ej. "ec"
+    name: str = ""
+    base_url: str = ""
+    download_dir: str = ""
+    # nombre de mes en los archivos -> número
+    month_names: dict = descargar_data.MESES
+    # tipo de archivo -> fragmentos del nombre que lo identifican
+    file_patterns: dict = {}
+    # tipo de archivo (según classify) -> clave de reporte en layouts
+    report_types: dict = {}
+    layouts: dict = {}
+    # {canónica: [variantes]} aplicados en la extracción; vacíos = sin remapear
+    category_map: dict = {}
+    company_map: dict = {}
+    # nombre (ya normalizado con company_map) -> nombre canónico del dashboard
+    operator_map: dict = {}
+
+    def classify(self, file_name: str):
+        """Retorna {'anio', 'mes', 'tipo', ...} o None si el archivo no es un reporte."""
+        return descargar_data.clasificar_enlace(file_name, self.month_names, self.file_patterns)
+
+    def download(self) -> None:
+        """Descarga el juego completo más reciente (un archivo por report_types) a self.download_dir."""
+        descargar_data.descargar_archivos_recientes(
+            self.download_dir, self.base_url, self.classify,
+            tipos_requeridos=tuple(self.report_types),
+        )
+
+    def vintages(self) -> list[tuple[str, dict]]:
+        """Ediciones completas en disco: [("AAAA-MM", {reporte: path}), ...] ordenadas."""
+        if not os.path.exists(self.download_dir):
+            return []
+        por_fecha = {}
+        for f in os.listdir(self.download_dir):
+            if not f.lower().endswith(('.xlsx', '.xls')):
+                continue
+            info = self.classify(f)
+            if not info or info['tipo'] not in self.report_types:
+                continue
+            key = f"{info['anio']:04d}-{info['mes']:02d}"
+            por_fecha.setdefault(key, {})[self.report_types[info['tipo']]] = os.path.join(self.download_dir, f)
+        requeridos = set(self.report_types.values())
+        return [(k, v) for k, v in sorted(por_fecha.items()) if requeridos <= set(v)]
+
+    def extract(self, path: str, report: str) -> pd.DataFrame:
+        df = etl_unified.extract(path, report, layouts=self.layouts,
+                                 category_map=self.category_map, company_map=self.company_map)
+        if self.operator_map:
+            # map sobre la categórica traduce cada etiqueta distinta una sola vez
+            df["company"] = df["company"].map(lambda c: self.operator_map.get(c, c)).astype("category")
+        return df
+
+
+class ArcotelAdapter(SourceAdapter):
+    """Ecuador (ARCOTEL): reutiliza el scraper y los layouts existentes."""
+
+    code = "ec"
+    name = "Ecuador - ARCOTEL"
+    base_url = descargar_data.BASE_URL
+    download_dir = etl_unified.DOWNLOAD_DIR
+    month_names = descargar_data.MESES
+    file_patterns = descargar_data.TIPOS_ARCHIVO
+    report_types = {"servicio": "servicios", "modalidad": "modalidad"}
+    layouts = etl_unified.REPORT_LAYOUTS
+    category_map = etl_unified.CANONICAL_CATEGORIES
+    company_map = etl_unified.CANONICAL_COMPANIES
+    # Los nombres del reporte ya son los que usa el dashboard
+    operator_map = {}
+
+
+ADAPTERS: dict[str, SourceAdapter] = {}
+
+
+# Sin estos atributos el scraper genérico caería en los valores de ARCOTEL
+# (URL y datos_descargados/) y mezclaría mercados sin avisar.
+REQUIRED_ATTRIBUTES = ("code", "base_url", "download_dir", "report_types", "layouts")
+
+
+def register_adapter(adapter: SourceAdapter) -> SourceAdapter:
+    missing = [attr for attr in REQUIRED_ATTRIBUTES if not getattr(adapter, attr)]
+    if missing:
+        raise ValueError(f"Adaptador {type(adapter).__name__} incompleto, faltan: {', '.join(missing)}")
+    ADAPTERS[adapter.code] = adapter
+    return adapter
+
+
+register_adapter(ArcotelAdapter())
+
+
+# =========================
+# ALMACÉN PARTICIONADO
+# =========================
+
+def partition_path(store_dir: str, market: str, report: str, vintage: str) -> str:
+    return os.path.join(store_dir, f"market={market}", f"report={report}", f"vintage={vintage}.csv")
+
+
+def write_partition(df: pd.DataFrame, store_dir: str, market: str, report: str, vintage: str) -> str:
+    path = partition_path(store_dir, market, report, vintage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_store(store_dir: str = None, market: str = None, report: str = None, vintage: str = None) -> pd.DataFrame:
+    """Lee las particiones que coinciden con los filtros, con columnas market/report/vintage."""
+    store_dir = store_dir or STORE_DIR
+    frames = []
+    if not os.path.exists(store_dir):
+        return pd.DataFrame()
+    for m_dir in sorted(os.listdir(store_dir)):
+        m = m_dir.partition("=")[2]
+        if market and m != market:
+            continue
+        for r_dir in sorted(os.listdir(os.path.join(store_dir, m_dir))):
+            r = r_dir.partition("=")[2]
+            if report and r != report:
+                continue
+            for f in sorted(os.listdir(os.path.join(store_dir, m_dir, r_dir))):
+                if not f.endswith(".csv"):
+                    continue
+                v = f[len("vintage="):-len(".csv")]
+                if vintage and v != vintage:
+                    continue
+                df = pd.read_csv(os.path.join(store_dir, m_dir, r_dir, f), encoding="utf-8-sig")
+                frames.append(df.assign(market=m, report=r, vintage=v))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# =========================
+# SCHEDULER
+# =========================
+
+def _pending_tasks(adapter: SourceAdapter, all_vintages: bool) -> list[tuple]:
+    """(adapter, report, path, vintage) por cada partición a escribir."""
+    vintages = adapter.vintages()
+    if not vintages:
+        print(f"[{adapter.code}] ADVERTENCIA: no hay ediciones completas en {adapter.download_dir}")
+        return []
+    if not all_vintages:
+        vintages = vintages[-1:]
+    return [
+        (adapter, report, path, vintage)
+        for vintage, files in vintages
+        for report, path in sorted(files.items())
+    ]
+
+
+def _extract_partition(adapter: SourceAdapter, report: str, path: str, vintage: str, store_dir: str) -> str:
+    # Corre en un proceso hijo: el adaptador llega picklado
+    df = adapter.extract(path, report)
+    return write_partition(df, store_dir, adapter.code, report, vintage)
+
+
+def run_adapter(adapter: SourceAdapter, store_dir: str, download: bool = True,
+                all_vintages: bool = False) -> list[str]:
+    """Descarga (opcional) y extrae un mercado en serie. Retorna las particiones escritas."""
+    if download:
+        adapter.download()
+    written = [
+        _extract_partition(a, report, path, vintage, store_dir)
+        for a, report, path, vintage in _pending_tasks(adapter, all_vintages)
+    ]
+    print(f"[{adapter.code}] {len(written)} particiones escritas")
+    return written
+
+
+def run_adapters(codes=None, store_dir: str = None, download: bool = True,
+                 all_vintages: bool = False, max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Corre los adaptadores (todos si codes es None) en dos fases:
+    1. descarga de todos los mercados a la vez en hilos (solo I/O de red);
+    2. extracción y escritura de cada partición en un ProcessPoolExecutor,
+       así el parseo de openpyxl de distintos libros corre en paralelo real.
+    Cada partición es un archivo propio, así que no hay conflictos.
+    Retorna {codigo: [particiones]}; lo que falla se informa y no detiene al resto.
+    """
+    store_dir = store_dir or STORE_DIR
+    adapters = [ADAPTERS[c] for c in (codes or ADAPTERS)]
+    results = {a.code: [] for a in adapters}
+
+    if download:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(a.download): a for a in adapters}
+            for fut in as_completed(futures):
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"[{futures[fut].code}] ERROR en descarga: {e}")
+
+    tasks = [t for a in adapters for t in _pending_tasks(a, all_vintages)]
+    if not tasks:
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+        futures = {pool.submit(_extract_partition, *task, store_dir): task for task in tasks}
+        for fut in as_completed(futures):
+            adapter, report, path, vintage = futures[fut]
+            try:
+                results[adapter.code].append(fut.result())
+            except Exception as e:
+                print(f"[{adapter.code}] ERROR extrayendo {os.path.basename(path)}: {e}")
+
+    for code, written in results.items():
+        written.sort()
+        print(f"[{code}] {len(written)} particiones escritas")
+    return results
+
+
+if __name__ == "__main__":
+    run_adapters()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén compacto de series de tiempo para las tablas de hechos.
+
+El formato largo repite fecha, empresa, categoría y fuente en cada fila.
+Aquí cada serie (source, company, category) se guarda como:
+- un bloque contiguo de índices de mes (int32, año * 12 + mes - 1)
+- un bloque contiguo de valores (float64)
+y los textos se codifican una sola vez en diccionarios.
+
+Uso:
+    store = SeriesStore.from_frame(etl_unified.extract(path, "servicios"))
+    meses, valores = store.get("servicios", "CONECEL S.A.", "TELEFONIA")
+    store.save("output/store")
+    store = SeriesStore.load("output/store")   # memory-mapped
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+FILES = {
+    "months": "months.npy",
+    "values": "values.npy",
+    "offsets": "offsets.npy",
+    "keys": "keys.npy",
+    "dictionaries": "dictionaries.json",
+}
+
+
+def month_index(d) -> int:
+    """date/Timestamp/"YYYY-MM-DD" -> índice de mes (año * 12 + mes - 1)."""
+    if isinstance(d, str):
+        d = date.fromisoformat(d[:10])
+    return int(d.year) * 12 + int(d.month) - 1
+
+
+def month_date(idx: int) -> date:
+    idx = int(idx)
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+class SeriesStore:
+    """
+    Series codificadas en arreglos contiguos.
+
+    La serie i ocupa months[offsets[i]:offsets[i + 1]] y values[...] (ordenadas por mes).
+    keys[i] = (source_id, company_id, category_id) en los diccionarios.
+    """
+
+    def __init__(self, months, values, offsets, keys, sources, companies, categories):
+        self.months = months
+        self.values = values
+        self.offsets = offsets
+        self.keys = keys
+        self.sources = list(sources)
+        self.companies = list(companies)
+        self.categories = list(categories)
+        self._index = {
+            (self.sources[s], self.companies[c], self.categories[k]): i
+            for i, (s, c, k) in enumerate(np.asarray(keys).tolist())
+        }
+
+    # ---------- construcción ----------
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SeriesStore":
+        """Construye el almacén desde un DataFrame largo (date, company, category, value, source)."""
+        dates = pd.to_datetime(df["date"])
+        month = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int32)
+
+        src_codes, sources = pd.factorize(df["source"], sort=True)
+        comp_codes, companies = pd.factorize(df["company"], sort=True)
+        cat_codes, categories = pd.factorize(df["category"], sort=True)
+
+        # Ordenar por serie y luego por mes para dejar cada serie contigua
+        order = np.lexsort((month, cat_codes, comp_codes, src_codes))
+        keys_all = np.stack([src_codes, comp_codes, cat_codes], axis=1)[order].astype(np.int32)
+        month = month[order]
+        values = pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype=np.float64)[order]
+
+        if len(keys_all):
+            starts = np.flatnonzero(np.r_[True, np.any(keys_all[1:] != keys_all[:-1], axis=1)])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        offsets = np.r_[starts, len(keys_all)].astype(np.int64)
+        keys = keys_all[starts]
+
+        return cls(month, values, offsets, keys, sources, companies, categories)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Reconstruye el formato largo (útil para exportar o comparar)."""
+        lengths = np.diff(self.offsets)
+        keys = np.repeat(np.asarray(self.keys), lengths, axis=0)
+        months = np.asarray(self.months)
+        return pd.DataFrame({
+            "date": [month_date(m) for m in months.tolist()],
+            "company": np.asarray(self.companies, dtype=object)[keys[:, 1]],
+            "category": np.asarray(self.categories, dtype=object)[keys[:, 2]],
+            "value": np.asarray(self.values),
+            "source": np.asarray(self.sources, dtype=object)[keys[:, 0]],
+        })
+
+    # ---------- consultas ----------
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __contains__(self, key) -> bool:
+        return tuple(key) in self._index
+
+    def series_keys(self) -> list[tuple[str, str, str]]:
+        return list(self._index)
+
+    def get(self, source: str, company: str, category: str):
+        """Retorna (months, values) de la serie como vistas, sin copiar. KeyError si no existe."""
+        i = self._index[(source, company, category)]
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.months[a:b], self.values[a:b]
+
+    def slice(self, source: str, company: str, category: str, start=None, end=None):
+        """Como get(), limitado al rango de meses [start, end] (inclusive)."""
+        months, values = self.get(source, company, category)
+        lo = 0 if start is None else int(np.searchsorted(months, month_index(start), side="left"))
+        hi = len(months) if end is None else int(np.searchsorted(months, month_index(end), side="right"))
+        return months[lo:hi], values[lo:hi]
+
+    # ---------- persistencia ----------
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, FILES["months"]), np.ascontiguousarray(self.months, dtype=np.int32))
+        np.save(os.path.join(directory, FILES["values"]), np.ascontiguousarray(self.values, dtype=np.float64))
+        np.save(os.path.join(directory, FILES["offsets"]), np.ascontiguousarray(self.offsets, dtype=np.int64))
+        np.save(os.path.join(directory, FILES["keys"]), np.ascontiguousarray(self.keys, dtype=np.int32))
+        with open(os.path.join(directory, FILES["dictionaries"]), "w", encoding="utf-8") as f:
+            json.dump({
+                "sources": self.sources,
+                "companies": self.companies,
+                "categories": self.categories,
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "SeriesStore":
+        """Carga un almacén guardado con save(). Con mmap=True los arreglos no se copian a RAM."""
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, FILES[name]), mmap_mode=mode)
+            for name in ("months", "values", "offsets", "keys")
+        }
+        with open(os.path.join(directory, FILES["dictionaries"]), "r", encoding="utf-8") as f:
+            dicts = json.load(f)
+        return cls(arrays["months"], arrays["values"], arrays["offsets"], arrays["keys"],
+                   dicts["sources"], dicts["companies"], dicts["categories"])
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import descargar_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "arcotel_listado.html")
+
+BASE = "https://www.arcotel.gob.ec/wp-content/uploads/"
+EXPECTED_HREFS = [
+    BASE + "2026/01/1.1.1-Lineas-activas-por-servicio_y_Densidad_diciembre_2025.xlsx",
+    BASE + "2026/01/1.1.2-Lineas-activas-por-modalidad_diciembre_2025.XLSX",
+    BASE + "2025/12/1.1.1-Líneas-activas-por-servicio_y_Densidad_noviembre_2025.xlsx",
+    BASE + "2025/12/1.1.2-Lineas-activas-por-modalidad_noviembre_2025.xlsx",
+    BASE + "2023/05/1.1.3-Lineas-activas-por-tecnologia_Abr-2023.xls",
+]
+
+
+class _Response:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        # Lo que haría requests sin charset en el Content-Type
+        self.encoding = "ISO-8859-1"
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def listado_bytes():
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+def _indice_vacio():
+    return {'etag': None, 'last_modified': None, 'hrefs': [], 'enlaces': {}}
+
+
+def test_extraer_hrefs_excel(listado_bytes):
+    hrefs = descargar_data.extraer_hrefs_excel(listado_bytes.decode("utf-8"))
+    # <A HREF> en mayúsculas incluido; pdf, anclas internas y <a> sin href fuera
+    assert hrefs == EXPECTED_HREFS
+
+
+def test_actualizar_indice_solo_clasifica_nuevos(listado_bytes):
+    hrefs = descargar_data.extraer_hrefs_excel(listado_bytes.decode("utf-8"))
+    indice = _indice_vacio()
+    llamadas = []
+
+    def clasificar(href):
+        llamadas.append(href)
+        return descargar_data.clasificar_enlace(href)
+
+    assert descargar_data.actualizar_indice(indice, hrefs[2:], clasificar) == 3
+    # Los dos nuevos, más el 1.1.3 que no se reconoció (None se reintenta)
+    assert descargar_data.actualizar_indice(indice, hrefs, clasificar) == 3
+    assert llamadas == hrefs[2:] + hrefs[:2] + [hrefs[4]]
+    assert indice['hrefs'] == hrefs
+    # 1.1.3 no es un reporte que se procese
+    assert indice['enlaces'][hrefs[4]] is None
+
+    disponibles = descargar_data.agrupar_disponibles(indice)
+    assert set(disponibles) == {(2025, 12), (2025, 11)}
+    assert set(disponibles[(2025, 12)]) == {'servicio', 'modalidad'}
+
+
+def test_obtener_listado_304_reutiliza_indice(monkeypatch):
+    indice = _indice_vacio()
+    indice.update(etag='"abc"', hrefs=EXPECTED_HREFS[:2])
+    enviados = {}
+
+    def fake_get(url, headers=None, timeout=None):
+        enviados.update(headers)
+        return _Response(status_code=304)
+
+    monkeypatch.setattr(descargar_data.requests, "get", fake_get)
+    assert descargar_data.obtener_listado(indice) == EXPECTED_HREFS[:2]
+    assert enviados['If-None-Match'] == '"abc"'
+
+
+def test_obtener_listado_decodifica_utf8_sin_charset(monkeypatch, listado_bytes):
+    indice = _indice_vacio()
+
+    def fake_get(url, headers=None, timeout=None):
+        return _Response(content=listado_bytes,
+                         headers={'Content-Type': 'text/html', 'ETag': '"v2"'})
+
+    monkeypatch.setattr(descargar_data.requests, "get", fake_get)
+    hrefs = descargar_data.obtener_listado(indice)
+    assert hrefs == EXPECTED_HREFS
+    assert indice['etag'] == '"v2"'
+
+
+def test_actualizar_indice_reclasifica_no_reconocidos():
+    href = BASE + "2026/10/1.1.1-Lineas-activas-por-servicio_y_Densidad_sept_2026.xlsx"
+    indice = _indice_vacio()
+    descargar_data.actualizar_indice(indice, [href])
+    # "sept" no está en MESES: queda sin clasificar
+    assert indice['enlaces'][href] is None
+
+    meses = dict(descargar_data.MESES, sept=9)
+    descargar_data.actualizar_indice(
+        indice, [href], lambda h: descargar_data.clasificar_enlace(h, meses))
+    assert indice['enlaces'][href]['mes'] == 9
+    assert indice['enlaces'][href]['tipo'] == 'servicio'
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+import pytest
+
+import etl_unified
+
+
+def test_normalize_labels_pliega_variantes():
+    df = pd.DataFrame({
+        "company": ["Conecel S.A", "OTECEL SA", "cnt e.p.", "TOTAL MERCADO"],
+        "category": ["Teléfonía + Internet", "SOLO  INTERNET", "Postpago", "total_empresa"],
+    })
+    out, unmapped = etl_unified.normalize_labels(df)
+    assert list(out["company"]) == ["CONECEL S.A.", "OTECEL S.A.", "CNT EP", "TOTAL_MERCADO"]
+    assert list(out["category"]) == ["TELEFONIA E INTERNET", "INTERNET", "POSPAGO", "TOTAL_EMPRESA"]
+    assert unmapped == {}
+
+
+def test_normalize_labels_reporta_sin_mapeo_y_no_fusiona_marcas():
+    df = pd.DataFrame({"company": ["Claro", "Movistar", "CONECEL S.A."], "category": ["Voz", "Voz", "TTUP"]})
+    out, unmapped = etl_unified.normalize_labels(df)
+    # Las marcas no se llevan a la razón social de Ecuador: eso es del operator_map
+    assert list(out["company"]) == ["Claro", "Movistar", "CONECEL S.A."]
+    assert list(out["category"]) == ["Voz", "Voz", "TTUP"]
+    assert unmapped == {"company": ["Claro", "Movistar"], "category": ["Voz"]}
+
+
+def test_normalize_labels_orden_de_categorias_estable():
+    a, _ = etl_unified.normalize_labels(pd.DataFrame({"company": ["Nueva", "CNT EP"], "category": ["DATOS", "Otra"]}))
+    b, _ = etl_unified.normalize_labels(pd.DataFrame({"company": ["CNT EP", "Nueva"], "category": ["Otra", "DATOS"]}))
+    for col, canonical in [("company", etl_unified.CANONICAL_COMPANIES), ("category", etl_unified.CANONICAL_CATEGORIES)]:
+        assert list(a[col].cat.categories) == list(b[col].cat.categories)
+        # Canónicas primero, en el orden declarado; las nuevas al final
+        assert list(a[col].cat.categories)[:len(canonical)] == list(canonical)
+    assert a["company"].cat.codes.tolist() == b["company"].cat.codes.tolist()[::-1]
+
+
+def test_normalize_labels_con_mapas_propios():
+    df = pd.DataFrame({"company": ["Claro"], "category": ["Voz y datos"]})
+    out, unmapped = etl_unified.normalize_labels(
+        df, category_map={"VOZ_DATOS": ["voz y datos"]}, company_map={})
+    assert list(out["category"]) == ["VOZ_DATOS"]
+    # Mapa vacío: la columna queda como está (categórica) y no se reporta
+    assert list(out["company"]) == ["Claro"]
+    assert unmapped == {}
+
+
+# ---------- caché de extract() ----------
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Sustituye la lectura del xlsx por un DataFrame mínimo y cuenta las llamadas."""
+    calls = []
+
+    def fake_read(input_path, report, layout, category_map=None, company_map=None):
+        calls.append(os.path.basename(input_path))
+        return pd.DataFrame({"company": ["CNT EP"], "category": ["DATOS"], "value": [1.0]})
+
+    etl_unified.clear_extract_cache()
+    monkeypatch.setattr(etl_unified, "_read_workbook", fake_read)
+    yield calls
+    etl_unified.clear_extract_cache()
+
+
+def _libro(tmp_path, name, content=b"x"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_cache_hit_retorna_copia_independiente(tmp_path, lecturas):
+    path = _libro(tmp_path, "a.xlsx")
+    df1 = etl_unified.extract(path, "servicios")
+    df1.loc[0, "value"] = 99.0
+    df2 = etl_unified.extract(path, "servicios")
+    assert lecturas == ["a.xlsx"]
+    assert df2.loc[0, "value"] == 1.0
+
+
+def test_cache_relee_si_cambia_el_archivo(tmp_path, lecturas):
+    path = _libro(tmp_path, "a.xlsx")
+    etl_unified.extract(path, "servicios")
+    # Mismo tamaño, otro mtime
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    etl_unified.extract(path, "servicios")
+    # Otro tamaño
+    with open(path, "ab") as f:
+        f.write(b"y")
+    etl_unified.extract(path, "servicios")
+    assert lecturas == ["a.xlsx"] * 3
+
+
+def test_cache_expulsa_lru_al_llenarse(tmp_path, lecturas, monkeypatch):
+    monkeypatch.setattr(etl_unified, "EXTRACT_CACHE_SIZE", 2)
+    a, b, c = (_libro(tmp_path, n) for n in ["a.xlsx", "b.xlsx", "c.xlsx"])
+    etl_unified.extract(a, "servicios")
+    etl_unified.extract(b, "servicios")
+    etl_unified.extract(a, "servicios")   # a pasa a ser el más reciente
+    etl_unified.extract(c, "servicios")   # expulsa b
+    assert len(etl_unified._EXTRACT_CACHE) == 2
+    etl_unified.extract(a, "servicios")
+    etl_unified.extract(b, "servicios")
+    assert lecturas == ["a.xlsx", "b.xlsx", "c.xlsx", "b.xlsx"]
+
+
+def test_clear_extract_cache_por_archivo(tmp_path, lecturas):
+    a, b = _libro(tmp_path, "a.xlsx"), _libro(tmp_path, "b.xlsx")
+    etl_unified.extract(a, "servicios")
+    etl_unified.extract(a, "modalidad")
+    etl_unified.extract(b, "servicios")
+    assert etl_unified.clear_extract_cache(a) == 2
+    etl_unified.extract(a, "servicios")
+    etl_unified.extract(b, "servicios")
+    assert lecturas == ["a.xlsx", "a.xlsx", "b.xlsx", "a.xlsx"]
+
+
+# ---------- validación cruzada ----------
+
+def _totales(rows):
+    """rows: [(date, company, value)] -> filas TOTAL_EMPRESA / TOTAL_MERCADO en formato largo."""
+    return pd.DataFrame([
+        {"date": d, "company": c, "category": "TOTAL_MERCADO" if c == "TOTAL_MERCADO" else "TOTAL_EMPRESA", "value": v}
+        for d, c, v in rows
+    ] + [{"date": "2025-01-01", "company": "CNT EP", "category": "DATOS", "value": 123.0}])
+
+
+def test_cross_check_une_filtra_y_marca():
+    tol = etl_unified.CROSS_CHECK_TOLERANCE
+    df_s = _totales([
+        ("2014-06-01", "CNT EP", 7.0),             # solo en servicios: fuera
+        ("2025-01-01", "CNT EP", 100.0 + tol),     # en la tolerancia: sin alerta
+        ("2025-01-01", "TOTAL_MERCADO", 1000.0 + tol + 0.01),
+        ("2025-02-01", "CNT EP", 0.0),             # cero en ambos: fuera
+    ])
+    df_m = _totales([
+        ("2025-01-01", "CNT EP", 100.0),
+        ("2025-01-01", "TOTAL_MERCADO", 1000.0),
+        ("2025-02-01", "CNT EP", 0.0),
+    ])
+    out = etl_unified.cross_check(df_s, df_m, vintage="2025-01")
+    assert out[["date", "company"]].values.tolist() == [["2025-01-01", "CNT EP"], ["2025-01-01", "TOTAL_MERCADO"]]
+    assert out["discrepancy"].tolist() == [False, True]
+    assert (out["vintage"] == "2025-01").all()
+    assert out.loc[1, "diff_pct"] == pytest.approx((tol + 0.01) / 1000.0 * 100)
+
+
+def test_cross_check_archive_separa_ediciones(monkeypatch):
+    ediciones = [((2025, 11), "s_nov", "m_nov"), ((2025, 12), "s_dic", "m_dic")]
+    reportes = {
+        # La misma fecha difiere solo en la edición de diciembre (revisión)
+        "s_nov": _totales([("2025-01-01", "CNT EP", 100.0)]),
+        "m_nov": _totales([("2025-01-01", "CNT EP", 100.0)]),
+        "s_dic": _totales([("2025-01-01", "CNT EP", 110.0)]),
+        "m_dic": _totales([("2025-01-01", "CNT EP", 100.0)]),
+    }
+    monkeypatch.setattr(etl_unified, "complete_vintages", lambda download_dir=None: ediciones)
+    monkeypatch.setattr(etl_unified, "extract", lambda path, report: reportes[path].copy())
+
+    out = etl_unified.cross_check_archive()
+    assert out["vintage"].tolist() == ["2025-11", "2025-12"]
+    assert out["diff"].tolist() == [0.0, 10.0]
+    assert out["discrepancy"].tolist() == [False, True]
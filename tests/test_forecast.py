@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+import forecast
+
+
+def test_seasonal_naive_exacto_en_serie_estacional():
+    patron = np.arange(1.0, 13.0)
+    Y = np.vstack([np.tile(patron, 3), np.tile(patron * 10, 3)])
+    fc, sd = forecast.seasonal_naive(Y, horizon=15)
+    np.testing.assert_array_equal(fc[0], np.r_[patron, patron[:3]])
+    np.testing.assert_array_equal(fc[1], np.r_[patron, patron[:3]] * 10)
+    assert fc.shape == sd.shape == (2, 15)
+    assert not sd.any()
+    # Sin un ciclo completo de historia no hay pronóstico
+    assert forecast.seasonal_naive(Y[:, :12], horizon=3) is None
+
+
+def test_holt_extrapola_tendencia_lineal():
+    t = np.arange(24.0)
+    Y = np.vstack([5.0 + 2.0 * t, 100.0 - 3.0 * t])
+    fc, sd, alpha, beta = forecast.holt(Y, horizon=6)
+    h = np.arange(1, 7)
+    np.testing.assert_allclose(fc[0], 5.0 + 2.0 * (23 + h))
+    np.testing.assert_allclose(fc[1], 100.0 - 3.0 * (23 + h))
+    np.testing.assert_allclose(sd, 0.0, atol=1e-9)
+    assert alpha.shape == beta.shape == (2,)
+
+
+def test_forecast_frame_corta_en_ultimo_total_mercado():
+    # 14 meses publicados y 4 filas futuras en cero (como trae el Excel)
+    dates = pd.date_range("2024-01-01", periods=18, freq="MS")
+    mercado = [100.0 + i for i in range(14)] + [0.0] * 4
+    rows = []
+    for d, v in zip(dates, mercado):
+        rows += [
+            {"date": d.strftime("%Y-%m-%d"), "company": "TOTAL_MERCADO", "category": "TOTAL_MERCADO", "value": v},
+            {"date": d.strftime("%Y-%m-%d"), "company": "CNT EP", "category": "DATOS", "value": v / 2},
+            {"date": d.strftime("%Y-%m-%d"), "company": "CNT EP", "category": "CHECK_SUM_SERVICIOS", "value": v / 2},
+        ]
+    df = pd.DataFrame(rows).assign(source="servicios")
+
+    out = forecast.forecast_frame(df, horizon=3)
+    assert list(out.columns) == ["date", "company", "category", "source", "model",
+                                 "horizon", "forecast", "lower", "upper"]
+    # 2 series (sin CHECK_*) x 2 modelos x 3 meses
+    assert len(out) == 12
+    assert set(out["model"]) == {"seasonal_naive", "holt"}
+    assert set(out["category"]) == {"TOTAL_MERCADO", "DATOS"}
+    # El pronóstico arranca después del último TOTAL_MERCADO > 0 (2025-02), no de las filas en cero
+    assert sorted(set(out["date"])) == ["2025-03-01", "2025-04-01", "2025-05-01"]
+    assert (out["lower"] <= out["forecast"]).all() and (out["forecast"] <= out["upper"]).all()
+
+    holt = out[(out["model"] == "holt") & (out["category"] == "TOTAL_MERCADO")]
+    np.testing.assert_allclose(holt["forecast"], [114.0, 115.0, 116.0])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+import fuentes
+
+
+class _OtroMercado(fuentes.SourceAdapter):
+    code = "xx"
+    month_names = {"january": 1, "jan": 1, "march": 3, "mar": 3}
+    file_patterns = {"prepaid": ["prepaid"], "postpaid": ["postpaid"]}
+    report_types = {"prepaid": "prepago", "postpaid": "pospago"}
+
+
+def test_adaptador_clasifica_con_sus_meses_y_patrones():
+    adapter = _OtroMercado()
+    assert adapter.classify("Mobile_lines_prepaid_March_2026.xlsx") == {
+        'anio': 2026, 'mes': 3, 'tipo': 'prepaid', 'nombre': "Mobile_lines_prepaid_March_2026.xlsx",
+    }
+    # Meses en español no se reconocen con el mapa del adaptador
+    assert adapter.classify("lineas_prepaid_marzo_2026.xlsx") is None
+    # El adaptador de Ecuador no reconoce archivos del otro mercado
+    assert fuentes.ADAPTERS["ec"].classify("Mobile_lines_prepaid_March_2026.xlsx") is None
+
+
+def test_vintages_exige_todos_los_reportes(tmp_path):
+    for name in ["lines_prepaid_jan_2026.xlsx", "lines_postpaid_jan_2026.xlsx", "lines_prepaid_mar_2026.xlsx"]:
+        (tmp_path / name).write_bytes(b"")
+    adapter = _OtroMercado()
+    adapter.download_dir = str(tmp_path)
+    vintages = adapter.vintages()
+    assert [v for v, _ in vintages] == ["2026-01"]
+    assert set(vintages[0][1]) == {"prepago", "pospago"}
+
+
+def test_register_adapter_rechaza_adaptadores_incompletos():
+    adapter = _OtroMercado()
+    with pytest.raises(ValueError, match="base_url, download_dir, layouts"):
+        fuentes.register_adapter(adapter)
+    assert "xx" not in fuentes.ADAPTERS
+
+
+def test_extract_usa_las_etiquetas_del_adaptador(monkeypatch):
+    calls = []
+
+    def fake_extract(path, report, **kwargs):
+        calls.append(kwargs)
+        return pd.DataFrame({"company": pd.Categorical(["Claro"]), "category": ["Voz"]})
+
+    monkeypatch.setattr(fuentes.etl_unified, "extract", fake_extract)
+    adapter = _OtroMercado()
+    adapter.company_map = {"Claro": ["claro"]}
+    adapter.operator_map = {"Claro": "America Movil"}
+    df = adapter.extract("x.xlsx", "prepago")
+    assert calls[0]["company_map"] == {"Claro": ["claro"]}
+    assert calls[0]["category_map"] == {}
+    assert calls[0]["layouts"] is adapter.layouts
+    assert list(df["company"]) == ["America Movil"]
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from series_store import SeriesStore, month_index
+
+
+@pytest.fixture
+def df_long():
+    # Filas desordenadas a propósito: from_frame debe dejar cada serie contigua y por mes
+    return pd.DataFrame({
+        "date": ["2025-03-01", "2025-01-01", "2025-02-01", "2025-01-01", "2025-02-01", "2025-01-01"],
+        "company": ["OTECEL S.A.", "OTECEL S.A.", "OTECEL S.A.", "CNT EP", "CNT EP", "CNT EP"],
+        "category": ["DATOS", "DATOS", "DATOS", "DATOS", "DATOS", "TTUP"],
+        "value": [3.0, 1.0, 2.0, 10.0, 20.0, 5.0],
+        "source": ["servicios"] * 6,
+    })
+
+
+def test_get_coincide_con_la_entrada(df_long):
+    store = SeriesStore.from_frame(df_long)
+    assert len(store) == 3
+    assert store.offsets.tolist() == [0, 2, 3, 6]
+
+    months, values = store.get("servicios", "OTECEL S.A.", "DATOS")
+    assert months.tolist() == [month_index("2025-01-01"), month_index("2025-02-01"), month_index("2025-03-01")]
+    assert values.tolist() == [1.0, 2.0, 3.0]
+    assert store.get("servicios", "CNT EP", "TTUP")[1].tolist() == [5.0]
+    with pytest.raises(KeyError):
+        store.get("servicios", "CNT EP", "PREPAGO")
+
+
+def test_slice_incluye_los_extremos(df_long):
+    store = SeriesStore.from_frame(df_long)
+    key = ("servicios", "OTECEL S.A.", "DATOS")
+    assert store.slice(*key, start="2025-02-01", end="2025-03-01")[1].tolist() == [2.0, 3.0]
+    assert store.slice(*key, start=date(2025, 1, 1), end="2025-01-01")[1].tolist() == [1.0]
+    assert store.slice(*key, end="2025-02-01")[1].tolist() == [1.0, 2.0]
+    assert store.slice(*key, start="2025-04-01")[1].tolist() == []
+
+
+def test_to_frame_ida_y_vuelta(df_long):
+    out = SeriesStore.from_frame(df_long).to_frame()
+    expected = df_long.assign(date=pd.to_datetime(df_long["date"]).dt.date)
+    key = ["source", "company", "category", "date"]
+    pd.testing.assert_frame_equal(
+        out.sort_values(key).reset_index(drop=True),
+        expected[out.columns].sort_values(key).reset_index(drop=True),
+    )
+
+
+def test_save_load_mmap(df_long, tmp_path):
+    store = SeriesStore.from_frame(df_long)
+    store.save(str(tmp_path))
+    loaded = SeriesStore.load(str(tmp_path), mmap=True)
+    for name in ("months", "values", "offsets", "keys"):
+        arr = getattr(loaded, name)
+        assert isinstance(arr, np.memmap)
+        np.testing.assert_array_equal(arr, getattr(store, name))
+    assert loaded.series_keys() == store.series_keys()
+    assert loaded.get("servicios", "CNT EP", "DATOS")[1].tolist() == [10.0, 20.0]
@@ -7,6 +7,8 @@ import time
 try:
     import descargar_data
     import etl_unified
+    import convert_to_js
+    import forecast
 except ImportError as e:
     print(f"Error importando módulos: {e}")
     sys.exit(1)
@@ -17,7 +19,7 @@ def run_pipeline():
     print("=========================================")
     
     # PASO 1: Descarga
-    print("\n[PASO 1/2] Ejecutando descarga de archivos...")
+    print("\n[PASO 1/4] Ejecutando descarga de archivos...")
     start_time = time.time()
     try:
         descargar_data.descargar_archivos_recientes()
@@ -26,15 +28,31 @@ def run_pipeline():
         return
     
     # PASO 2: Procesamiento (ETL)
-    print("\n[PASO 2/2] Procesando archivos (ETL)...")
+    print("\n[PASO 2/4] Procesando archivos (ETL)...")
     try:
         # El ETL unificado ya tiene lógica para detectar los archivos más recientes
         # en la carpeta 'datos_descargados', así que solo necesitamos ejecutarlo.
-        etl_unified.main()
+        frames = etl_unified.main()
     except Exception as e:
         print(f"❌ Error crítico en el procesamiento ETL: {e}")
         return
 
+    # PASO 3: Pronósticos (seasonal naive + Holt) para todas las series
+    print("\n[PASO 3/4] Calculando pronósticos...")
+    try:
+        forecast.main(etl_unified.OUTPUT_DIR, frames=frames)
+    except Exception as e:
+        print(f"❌ Error crítico calculando pronósticos: {e}")
+        return
+
+    # PASO 4: Shards por vista para el dashboard
+    print("\n[PASO 4/4] Generando shards del dashboard...")
+    try:
+        convert_to_js.export_shards(etl_unified.OUTPUT_DIR, frames=frames)
+    except Exception as e:
+        print(f"❌ Error crítico generando shards: {e}")
+        return
+
     elapsed = time.time() - start_time
     print("\n=========================================")
     print(f"✅ PIPELINE FINALIZADO en {elapsed:.2f} segundos.")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Verificación de regresión contra salidas "golden".
+
+Corre cada motor de extracción sobre los libros de octubre 2025 guardados en
+datos_descargados/ y compara byte a byte el CSV resultante con golden/.
+También falla si el tiempo o la memoria pico de una extracción superan el
+presupuesto registrado en golden/budgets.json.
+
+Uso:
+    python verificar_golden.py            # verificar (exit 1 si algo falla)
+    python verificar_golden.py --record   # re-registrar presupuestos medidos
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import etl_unified
+
+GOLDEN_DIR = os.path.join(etl_unified.BASE_DIR, "golden")
+BUDGETS_PATH = os.path.join(GOLDEN_DIR, "budgets.json")
+# Al registrar, el presupuesto es lo medido por este margen (holgura para runners de CI)
+BUDGET_MARGIN = 3.0
+
+# (reporte, libro de entrada, [(vista, archivo golden)])
+CASES = [
+    ("servicios",
+     "1.1.1-Lineas-activas-por-servicio_y_Densidad_octubre_2025.xlsx",
+     [("long", "lineas_por_servicio_long.csv")]),
+    ("modalidad",
+     "1.1.2-Lineas-activas-por-modalidad_octubre_2025.xlsx",
+     [("long", "lineas_por_modalidad_long.csv"),
+      ("fact", "lineas_por_modalidad_fact.csv")]),
+]
+
+# Motores de extracción a verificar. Un motor nuevo se registra aquí y debe
+# producir exactamente las mismas salidas.
+ENGINES = {
+    "openpyxl": lambda path, report: etl_unified.extract(path, report, use_cache=False),
+}
+
+VIEWS = {
+    "long": lambda df: df,
+    "fact": etl_unified.fact_view,
+}
+
+
+def _to_csv_bytes(df) -> bytes:
+    # Igual que los escritores del ETL (utf-8-sig); fin de línea normalizado a \n
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, lineterminator="\n")
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args)
+    finally:
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def _first_diff(a: bytes, b: bytes) -> str:
+    la, lb = a.splitlines(), b.splitlines()
+    for i, (x, y) in enumerate(zip(la, lb)):
+        if x != y:
+            return f"línea {i + 1}: {x[:80]!r} != {y[:80]!r}"
+    return f"largo distinto: {len(la)} vs {len(lb)} líneas"
+
+
+def run(record: bool = False, download_dir: str = None) -> bool:
+    download_dir = download_dir or etl_unified.DOWNLOAD_DIR
+    budgets = {}
+    if os.path.exists(BUDGETS_PATH):
+        with open(BUDGETS_PATH, "r", encoding="utf-8") as f:
+            budgets = json.load(f)
+
+    ok = True
+    for engine, fn in ENGINES.items():
+        for report, workbook, views in CASES:
+            name = f"{engine}/{report}"
+            path = os.path.join(download_dir, workbook)
+            if not os.path.exists(path):
+                print(f"FALLA {name}: no se encontró {path}")
+                ok = False
+                continue
+
+            df, seconds, peak_mb = _measure(fn, path, report)
+
+            for view, golden_file in views:
+                with open(os.path.join(GOLDEN_DIR, golden_file), "rb") as f:
+                    expected = f.read().replace(b"\r\n", b"\n")
+                actual = _to_csv_bytes(VIEWS[view](df))
+                if actual == expected:
+                    print(f"OK    {name} {golden_file}")
+                else:
+                    print(f"FALLA {name} {golden_file}: {_first_diff(actual, expected)}")
+                    ok = False
+
+            if record:
+                budgets[name] = {
+                    "seconds": round(seconds * BUDGET_MARGIN, 2),
+                    "peak_mb": round(peak_mb * BUDGET_MARGIN, 1),
+                }
+                print(f"      {name}: {seconds:.2f} s, {peak_mb:.1f} MB (registrado)")
+                continue
+
+            budget = budgets.get(name)
+            if budget is None:
+                print(f"FALLA {name}: sin presupuesto registrado (usar --record)")
+                ok = False
+                continue
+            estado = "OK   " if seconds <= budget["seconds"] and peak_mb <= budget["peak_mb"] else "FALLA"
+            if estado == "FALLA":
+                ok = False
+            print(f"{estado} {name}: {seconds:.2f} s / {budget['seconds']} s, "
+                  f"{peak_mb:.1f} MB / {budget['peak_mb']} MB")
+
+    if record:
+        with open(BUDGETS_PATH, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Presupuestos guardados en {BUDGETS_PATH}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    ok = run(record="--record" in sys.argv[1:])
+    print("\nVERIFICACIÓN OK" if ok else "\nVERIFICACIÓN FALLIDA")
+    sys.exit(0 if ok else 1)